@@ -1,33 +1,96 @@
 # config.py
+import copy
+import functools
 import json
-import yaml
+from collections import OrderedDict
 from pathlib import Path
 from typing import Dict, Any
-from ruamel.yaml import YAML
 
-# 创建 YAML 实例（配置统一格式）
-_yaml = YAML()
-_yaml.default_flow_style = False
-_yaml.allow_unicode = True
-_yaml.indent(mapping=2, sequence=4, offset=2)
-_yaml.preserve_quotes = True
-_yaml.sort_keys = False
+# yaml / ruamel.yaml 按需在用到的分支里导入，只列处理器或生成 JSON 模板时不付导入开销
+
+
+@functools.lru_cache(maxsize=1)
+def _get_safe_loader():
+    """加载配置只需要普通 dict，优先使用 libyaml 的 C 实现（比 ruamel 往返模式快得多）"""
+    try:
+        from yaml import CSafeLoader as loader
+    except ImportError:  # 未编译 libyaml 时回退到纯 Python 实现
+        from yaml import SafeLoader as loader
+    return loader
+
+# JSON 配置优先用 orjson 解析（可选依赖）
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+
+@functools.lru_cache(maxsize=1)
+def _get_yaml():
+    """创建 YAML 实例（配置统一格式）
+
+    往返模式仅用于保存/格式化（保留注释与引号），加载配置走 SafeLoader
+    """
+    from ruamel.yaml import YAML
+    _yaml = YAML()
+    _yaml.default_flow_style = False
+    _yaml.allow_unicode = True
+    _yaml.indent(mapping=2, sequence=4, offset=2)
+    _yaml.preserve_quotes = True
+    _yaml.sort_keys = False
+    return _yaml
+
 
 def to_plain_dict(data):
-    """递归地将 CommentedMap / OrderedDict 转为普通 dict"""
+    """递归地将 CommentedMap / OrderedDict 转为普通 dict
+
+    load_config 使用 SafeLoader，已直接返回普通 dict；此函数只用于
+    ruamel 往返加载（_yaml_load）得到的数据。
+    """
     if isinstance(data, dict):
         return {k: to_plain_dict(v) for k, v in data.items()}
     elif isinstance(data, list):
-        return [to_plain_dict(item) for item in item]
+        return [to_plain_dict(item) for item in data]
     else:
         return data
 
 def _yaml_load(config: str | Path) -> Dict[str, Any]:
-    return _yaml.load(config)
+    return _get_yaml().load(config)
+
+def _parse_config_file(path: Path, suffix: str) -> Dict[str, Any]:
+    """按扩展名解析配置文件（不做缓存）"""
+    if suffix in (".yaml", ".yml"):
+        with open(path, 'r', encoding='utf-8') as f:
+            try:
+                import yaml
+                data = yaml.load(f, Loader=_get_safe_loader())
+                return data or {}
+            except Exception as e:
+                raise ValueError(f"YAML 解析错误: {e}")
+
+    elif suffix == ".json":
+        # orjson 只接受 bytes，以二进制方式读取
+        with open(path, 'rb') as f:
+            try:
+                return _json_loads(f.read())
+            except Exception as e:
+                raise ValueError(f"JSON 解析错误: {e}")
+
+    else:
+        raise ValueError(f"不支持的配置文件格式: {suffix}，仅支持 .yaml/.yml/.json")
+
+
+# 已解析配置的缓存：(绝对路径, st_mtime_ns, st_size) -> 配置字典
+# 文件未变化时跳过解析，只需一次 stat
+_CONFIG_CACHE_MAXSIZE = 128
+_CONFIG_CACHE: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+
 
 def load_config(config_path: str | Path) -> Dict[str, Any]:
     """
     加载配置文件，支持 .yaml, .yml, .json
+    同一文件在未修改（mtime/size 不变）时直接返回缓存结果的深拷贝。
     :param config_path: 配置文件路径
     :return: 配置字典
     :raises: FileNotFoundError, ValueError
@@ -38,24 +101,24 @@ def load_config(config_path: str | Path) -> Dict[str, Any]:
         raise FileNotFoundError(f"配置文件不存在: {path}")
 
     suffix = path.suffix.lower()
+    st = path.stat()
+    key = (str(path.resolve()), st.st_mtime_ns, st.st_size)
 
-    if suffix in (".yaml", ".yml"):
-        with open(path, 'r', encoding='utf-8') as f:
-            try:
-                data = _yaml.load(f)
-                return data or {}
-            except Exception as e:
-                raise ValueError(f"YAML 解析错误: {e}")
+    cached = _CONFIG_CACHE.get(key)
+    if cached is not None:
+        _CONFIG_CACHE.move_to_end(key)
+        # 返回拷贝，避免调用方修改污染缓存
+        return copy.deepcopy(cached)
 
-    elif suffix == ".json":
-        with open(path, 'r', encoding='utf-8') as f:
-            try:
-                return json.load(f)
-            except Exception as e:
-                raise ValueError(f"JSON 解析错误: {e}")
+    data = _parse_config_file(path, suffix)
+    _CONFIG_CACHE[key] = copy.deepcopy(data)
+    if len(_CONFIG_CACHE) > _CONFIG_CACHE_MAXSIZE:
+        _CONFIG_CACHE.popitem(last=False)
+    return data
 
-    else:
-        raise ValueError(f"不支持的配置文件格式: {suffix}，仅支持 .yaml/.yml/.json")
+
+# 测试或强制重新读取时清空缓存
+load_config.cache_clear = _CONFIG_CACHE.clear
 
 
 def save_config(config: Dict[str, Any], config_path: str | Path) -> None:
@@ -74,7 +137,7 @@ def save_config(config: Dict[str, Any], config_path: str | Path) -> None:
     if suffix in (".yaml", ".yml"):
         # 使用 ruamel.yaml 格式化写入
         with open(path, 'w', encoding='utf-8') as f:
-            _yaml.dump(config, f)
+            _get_yaml().dump(config, f)
     elif suffix == ".json":
         with open(path, 'w', encoding='utf-8') as f:
             json.dump(config, f, ensure_ascii=False, indent=2)
@@ -90,7 +153,7 @@ def format_config_yaml(config: Dict[str, Any]) -> str:
     """
     from io import StringIO
     buffer = StringIO()
-    _yaml.dump(config, buffer)
+    _get_yaml().dump(config, buffer)
     return buffer.getvalue()
 
 
@@ -112,11 +175,18 @@ def format_config_yaml(config: Dict[str, Any]) -> str:
 
 # 加载plugins中的处理函数，自动加载plugins/*.py
 import importlib.util
+
+
 def load_plugins(plugin_dir: str = "plugins"):
-    """自动加载 plugins/ 目录下的所有 Python 文件"""
-    for file in Path(plugin_dir).glob("*.py"):
-        if file.name == "__init__.py":
-            continue
+    """自动加载 plugins/ 目录下的所有 Python 文件
+
+    按文件名顺序串行执行（即注册处理器），保证同名处理器的覆盖顺序确定。
+    执行走标准的 SourceFileLoader，它自己读写 __pycache__ 中的 .pyc，
+    未修改的插件直接加载缓存的字节码，跳过词法/语法分析与编译。
+    """
+    files = sorted(f for f in Path(plugin_dir).glob("*.py")
+                   if f.name != "__init__.py")
+    for file in files:
         spec = importlib.util.spec_from_file_location(file.stem, file)
         module = importlib.util.module_from_spec(spec)
         try:
@@ -126,7 +196,6 @@ def load_plugins(plugin_dir: str = "plugins"):
             print(f"❌ 加载失败 {file.name}: {e}")
 
 
-
 def generate_template(output_path: str | Path):
     """生成配置模板"""
     template = {
@@ -139,6 +208,7 @@ def generate_template(output_path: str | Path):
     }
     path = Path(output_path)
     if path.suffix.lower() == ".yaml" or path.suffix.lower() == ".yml":
+        import yaml
         with open(path, 'w', encoding='utf-8') as f:
             yaml.dump(template, f, indent=2, allow_unicode=True, sort_keys=False)
     else:
@@ -1,12 +1,180 @@
 # core.py - BatchProcessor with pre/post per-path and accurate progress
 
+import copy
 from pathlib import Path
-from datetime import datetime
 import fnmatch
+import functools
+import itertools
+import logging
+import operator
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from wcmatch import glob
-import traceback
-from typing import Dict, List, Tuple, Any, Optional
-from decorators.processor import ProcessingContext, PROCESSORS, PRE_PROCESSORS, POST_PROCESSORS
+from typing import Callable, Dict, Iterator, List, Tuple, Any, Optional
+from decorators.processor import ProcessingContext, ItemMeta, PROCESSORS, PRE_PROCESSORS, POST_PROCESSORS
+
+class _StdoutHandler(logging.StreamHandler):
+    """StreamHandler bound to whatever `sys.stdout` is at emit time.
+
+    The GUI worker swaps `sys.stdout` for its log widget during a run, so
+    the stream cannot be captured once at import. Each record is written
+    immediately, so status lines stay in order with the processors' own
+    print() output; like print(), it leaves flushing to the stream's own
+    buffering instead of forcing a flush per line.
+    """
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+    def flush(self):
+        pass
+
+
+# Engine status lines (per-step status, failures, run-level messages) used
+# to be print()ed. They go through this logger so they can be silenced or
+# redirected via logging, and per-step lines are only formatted when INFO
+# is enabled for it.
+status_logger = logging.getLogger(__name__ + ".status")
+status_logger.setLevel(logging.INFO)
+status_logger.propagate = False
+_status_handler = _StdoutHandler()
+status_logger.addHandler(_status_handler)
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile_pattern(pattern: str, dir_only: bool):
+    """Compile a rule pattern (GLOBSTAR) once; shared by every
+    BatchProcessor/run. The trailing '/' of directory rules is stripped
+    here, so callers pass the pattern exactly as written in the config."""
+    if dir_only:
+        pattern = pattern.rstrip('/')
+    return glob.compile(pattern, flags=glob.GLOBSTAR)
+
+
+def _child_rel(parent_rel: str, name: str) -> str:
+    """Relative POSIX path of a child entry, built from its parent's."""
+    return name if parent_rel == "." else f"{parent_rel}/{name}"
+
+# glob metacharacters (GLOBSTAR only; braces/extglob are not enabled)
+_GLOB_MAGIC = frozenset('*?[\\')
+# wcmatch matches case-insensitively on Windows; literal prefixes must too
+_GLOB_IGNORECASE = bool(glob.compile('A').match('a'))
+
+
+def _literal_prefix(pattern: str) -> str:
+    """Leading path components of a glob that contain no metacharacters.
+
+    A path can only match the pattern if it equals this prefix or lies
+    below it, e.g. 'data/raw/*.csv' -> 'data/raw', '**/*.txt' -> ''.
+    """
+    parts = []
+    for comp in pattern.split('/')[:-1]:
+        if not comp or _GLOB_MAGIC.intersection(comp):
+            break
+        parts.append(comp)
+    prefix = '/'.join(parts)
+    return prefix.lower() if _GLOB_IGNORECASE else prefix
+
+
+def _suffix_only(pattern: str) -> bool:
+    """True if the last component of a file pattern is '*' or '*.ext'.
+
+    For such patterns whether a file matches depends only on its parent
+    directory, its suffix and whether it is a dot-file.
+    """
+    last = pattern.rsplit('/', 1)[-1]
+    if last == '*':
+        return True
+    ext = last[2:]
+    return (last.startswith('*.') and bool(ext) and '.' not in ext
+            and not _GLOB_MAGIC.intersection(ext))
+
+
+_path_key = operator.itemgetter(0)
+
+
+def _scandir_children(path: Path,
+                      sink: Optional[Dict[str, Any]] = None
+                      ) -> List[Tuple[Path, bool]]:
+    """List a directory's children as (path, is_dir), sorted by path.
+
+    The order is that of `sorted(path.iterdir())` (Path ordering, which is
+    case-insensitive on Windows).
+
+    Uses os.scandir so `is_dir` comes from the directory entry (no extra
+    stat per child on most platforms). Symlinks are followed, like
+    `Path.is_dir()`. Inaccessible directories yield no children.
+
+    If `sink` is given, each DirEntry is stored there under its path
+    string so `ProcessingContext.stat()` can reuse its cached stat.
+    """
+    try:
+        with os.scandir(path) as it:
+            entries = list(it)
+    except (PermissionError, OSError):
+        return []
+    children = []
+    for e in entries:
+        try:
+            is_dir = e.is_dir()
+        except OSError:
+            is_dir = False
+        children.append((Path(e.path), is_dir))
+        if sink is not None:
+            sink[e.path] = e
+    children.sort(key=_path_key)
+    return children
+
+
+@dataclass(slots=True)
+class CompiledRule:
+    """One config rule prepared for matching.
+
+    The processor lists hold (name, config, priority) in config order;
+    every entry of a rule shares the rule's priority, so each list is
+    already in priority order and only needs merging across rules.
+    """
+    pattern: str
+    matcher: Any  # compiled wcmatch glob, None for '.'
+    dir_only: bool
+    prefix: str = ''  # literal leading directories (see `_literal_prefix`)
+    parallel_safe: bool = False  # rule opts in to running files in the pool
+    pre: List[Tuple[str, Dict, int]] = field(default_factory=list)
+    inline: List[Tuple[str, Dict, int]] = field(default_factory=list)
+    post: List[Tuple[str, Dict, int]] = field(default_factory=list)
+
+
+# top-level config keys that configure global hooks rather than path rules
+_META_KEYS = frozenset({
+    "pre_process", "post_process", "config_pre", "config_post",
+    "parallel_workers", "status_log_enabled", "debug_tracebacks", "verbose"
+})
+# rule keys that actually contribute processors
+_PROC_KEYS = ("processors", "pre_processors", "post_processors")
+
+# status-line labels, built once instead of per processor call
+_ITEM_DIR = "📁目录"
+_ITEM_FILE = "📄文件"
+
+# how many `_is_cancelled()` checks pass between polls of the Qt thread
+# (per-file loop only; global and folder post steps always poll)
+_CANCEL_POLL_INTERVAL = 32
+
+# upper bound on memoized (rel_path, is_dir) rule lookups kept between runs
+_RULES_MEMO_MAXSIZE = 65536
+
+# status log: write buffer size, and flush every N progress lines during a run
+_STATUS_BUFFER_SIZE = 64 * 1024
+_STATUS_FLUSH_INTERVAL = 100
 
 
 class BatchProcessor:
@@ -24,14 +192,74 @@ class BatchProcessor:
         self.current_status: Optional[str] = None
         # default status log file (can be overridden via `set_status_log`)
         self.status_log_path: Path = Path.cwd() / 'debug_logs' / 'status.log'
+        # the status log is opt-in: config `status_log_enabled: true`, or an
+        # explicit `set_status_log(...)` call
+        self._status_log_forced = False
+        self.status_log_enabled = bool(
+            self.config.get('status_log_enabled', False))
+        self._status_log_ready = False
+        self._in_run = False
+        # full tracebacks for processor failures only when debugging
+        self.debug_tracebacks = bool(
+            self.config.get('debug_tracebacks', False))
+        # per-step status lines on stdout (status_logger)
+        self.verbose = bool(self.config.get('verbose', True))
+        # per-run compiled rules (see `_compile_rules`)
+        self._compiled_rules: Optional[List[CompiledRule]] = None
+        # built-in recorders to inject: (inline name, post name), None = off
+        self._builtin_recorders: Tuple[Optional[str], Optional[str]] = (None,
+                                                                        None)
+        # rule indices bucketed by the first literal path component; rules
+        # without a literal prefix are checked for every path
+        self._rule_buckets: Dict[str, List[int]] = {}
+        self._unprefixed_rules: List[int] = []
+        # files: (parent rel, is dot-file, suffix) -> resolved rules; only
+        # used when every file-matching rule is `_suffix_only`
+        self._ruleset_cache: Dict[Tuple[str, bool, str], Dict] = {}
+        self._suffix_cacheable = False
+        self._compiled_config: Optional[Dict] = None
+        # registry snapshot the compiled rules were bound against
+        self._compiled_registry: Optional[Dict[str, Callable]] = None
+        # (rel_path, is_dir) -> resolved rules, valid while the config is unchanged
+        self._rules_memo: Dict[Tuple[str, bool], Dict] = {}
+        # matched rule indices -> resolved rules (shared by all paths that hit
+        # the same set of rules)
+        self._signature_memo: Dict[Tuple[int, ...], Dict] = {}
+        # cancellation: set by `cancel()` or latched from the worker thread
+        self._cancel_event = threading.Event()
+        self._cancel_polls = 0
+        # status log handle, open only while run() is active
+        self._status_fh = None
+        self._status_ticks = 0
+        # cached status-log timestamp (epoch second -> formatted string)
+        self._last_ts_epoch = 0
+        self._last_ts_str = ''
+        # thread pool (only during run() with parallel_workers > 1) and the
+        # lock guarding the step counter / status log shared with it
+        self._pool: Optional[ThreadPoolExecutor] = None
+        # during run(): the context's stat_cache, filled with DirEntries
+        self._stat_sink: Optional[Dict[str, Any]] = None
+        self._step_lock = threading.Lock()
+        # total steps of the most recent run (None before the first run)
+        self._last_total_steps: Optional[int] = None
+        # path -> (is_dir, rules, [(child, is_dir)]) collected by the counting walk
+        self._walk_cache: Dict[Path, Tuple[bool, Dict,
+                                           List[Tuple[Path, bool]]]] = {}
 
     def set_config(self, config: Dict):
         self.config = config
+        self.status_log_enabled = self._status_log_forced or bool(
+            config.get('status_log_enabled', False))
+        self.debug_tracebacks = bool(config.get('debug_tracebacks', False))
+        self.verbose = bool(config.get('verbose', True))
+        self._compiled_rules = None
 
     def set_progress_callback(self, callback):
         self.progress_callback = callback
 
-    def _call_progress(self, current: int, total: int, status: str):
+    def _call_progress(self, current: int, total: Optional[int],
+                       status: str):
+        # `total` is None when the step count is not known (yet)
         # update in-memory status
         try:
             self.current_status = status
@@ -47,18 +275,61 @@ class BatchProcessor:
                 pass
 
         # persist a short status line to the status log for external monitoring
+        if not self.status_log_enabled:
+            return
         try:
-            log_path = self.status_log_path
-            log_dir = log_path.parent
-            if not log_dir.exists():
-                log_dir.mkdir(parents=True, exist_ok=True)
-            ts = datetime.now().isoformat(sep=' ', timespec='seconds')
-            with open(log_path, 'a', encoding='utf-8') as fh:
-                fh.write(f"{ts} | {current}/{total} | {status}\n")
+            # second resolution only: reformat the timestamp once per second
+            sec = int(time.time())
+            if sec != self._last_ts_epoch:
+                self._last_ts_str = time.strftime('%Y-%m-%d %H:%M:%S',
+                                                  time.localtime(sec))
+                self._last_ts_epoch = sec
+            line = f"{self._last_ts_str} | {current}/{'?' if total is None else total} | {status}\n"
+            fh = self._status_fh
+            if fh is None and self._in_run:
+                # first line of this run: open the buffered handle now
+                fh = self._status_fh = self._open_status_log()
+            if fh is None:
+                # outside run(): no long-lived handle, append directly
+                with self._open_status_log(buffering=-1) as fh:
+                    fh.write(line)
+                return
+            fh.write(line)
+            self._status_ticks += 1
+            # flush periodically so external monitors still see progress
+            if self._status_ticks % _STATUS_FLUSH_INTERVAL == 0:
+                fh.flush()
         except Exception:
             # non-fatal: don't raise from logging failures
             pass
 
+    def _ensure_status_log(self) -> Path:
+        """Create the status log directory once (until the path changes)."""
+        log_path = self.status_log_path
+        if not self._status_log_ready:
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+            self._status_log_ready = True
+        return log_path
+
+    def _open_status_log(self, buffering: int = _STATUS_BUFFER_SIZE):
+        return open(self._ensure_status_log(),
+                    'a',
+                    encoding='utf-8',
+                    buffering=buffering)
+
+    def _close_status_log(self) -> None:
+        fh, self._status_fh = self._status_fh, None
+        if fh is not None:
+            try:
+                fh.close()
+            except Exception:
+                pass
+
+    def _log_failure(self, exc: BaseException, msg: str) -> None:
+        """Log a caught failure once, on the status stream; the traceback
+        is only rendered when `debug_tracebacks` is on."""
+        status_logger.error(msg, exc_info=exc if self.debug_tracebacks else None)
+
     def set_worker(self, worker):
         self.worker = worker
 
@@ -73,15 +344,37 @@ class BatchProcessor:
         # if a directory given, use `status.log` inside it
         if p.exists() and p.is_dir():
             p = p / 'status.log'
-        # ensure parent exists (created on first write as well)
+        # parent dir is created on first write
         self.status_log_path = p
+        self._status_log_ready = False
+        self._status_log_forced = True
+        self.status_log_enabled = True
 
     def get_current_status(self) -> Optional[str]:
         return self.current_status
 
-    def _is_cancelled(self) -> bool:
-        if self.worker and self.worker.thread():
-            return self.worker.thread().isInterruptionRequested()
+    def cancel(self):
+        """Request cancellation of the current run (safe from any thread)."""
+        self._cancel_event.set()
+
+    def _is_cancelled(self, force: bool = False) -> bool:
+        """True once the run was cancelled.
+
+        The Qt interruption flag is a cross-thread C++ call, so in the hot
+        per-file loop it is only polled every _CANCEL_POLL_INTERVAL checks;
+        `force=True` polls it now (used before post steps).
+        """
+        if self._cancel_event.is_set():
+            return True
+        if not self.worker:
+            return False
+        self._cancel_polls += 1
+        if not force and self._cancel_polls % _CANCEL_POLL_INTERVAL:
+            return False
+        thread = self.worker.thread()
+        if thread and thread.isInterruptionRequested():
+            self._cancel_event.set()
+            return True
         return False
 
     def set_processors(self, pre=None, main=None, post=None):
@@ -92,29 +385,71 @@ class BatchProcessor:
             self._processors = main
         if post is not None:
             self._post_processors = post
+        # built-in recorder injection depends on the registry
+        self._compiled_rules = None
 
     # ==================== PUBLIC API ====================
     def run(self,
             root_path: str | Path,
             context: ProcessingContext = None) -> ProcessingContext:
+        # one buffered status-log handle per run instead of open/append/close
+        # on every progress tick; opened lazily by the first `_call_progress`
+        self._status_fh = None
+        self._in_run = True
+        self._status_ticks = 0
+        # optional thread pool for files whose rules are `parallel_safe`
+        workers = self.config.get("parallel_workers") or 0
+        self._pool = (ThreadPoolExecutor(max_workers=int(workers))
+                      if int(workers) > 1 else None)
         context = context or ProcessingContext()
+        try:
+            return self._run(root_path, context)
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+            self._stat_sink = None
+            # hooks registered by processors (context.on_run_end), also when
+            # the run was cancelled or failed
+            self._call_run_end_hooks(context)
+            self._in_run = False
+            self._close_status_log()
+
+    def _call_run_end_hooks(self, context: ProcessingContext) -> None:
+        for key, func in context.pop_run_end_hooks():
+            try:
+                func(context)
+            except Exception as e:
+                self._log_failure(e, f"❌ 运行结束处理失败 [{key}]: {e}")
+
+    def _run(self, root_path: str | Path,
+             context: ProcessingContext) -> ProcessingContext:
         root = Path(root_path)
         if not root.exists():
             raise FileNotFoundError(f"路径不存在: {root}")
 
         context.root_path = root
         self.root_path = root
-        print(f"🔍 开始处理: {root}")
+        self._cancel_event.clear()
+        self._cancel_polls = 0
+        self._compile_rules()
+        # per-run stat cache, filled lazily from the walk's directory entries
+        context.stat_cache.clear()
+        self._stat_sink = context.stat_cache
+        status_logger.info(f"🔍 开始处理: {root}")
 
         # 获取全局钩子
         global_pre_name, config_pre = self._get_pre_config()
         global_post_name, config_post = self._get_post_config()
 
-        # 精确统计总步数
-        total_processor_calls = self._count_total_processor_calls(root)
+        # 精确统计总步数：唯一的一次目录遍历，结果（规则、子项）缓存给下面的执行阶段复用
+        total_processor_calls = sum(
+            len(rules["pre"]) + len(rules["inline"]) + len(rules["post"])
+            for _, rules, _ in self._walk_tree(root).values())
         total_steps = ((1 if global_pre_name else 0) + total_processor_calls +
                        (1 if global_post_name else 0))
-        print(f"📊 总操作数: {total_steps}")
+        self._last_total_steps = total_steps
+        status_logger.info(f"📊 总操作数: {total_steps}")
 
         current_step = 0
 
@@ -123,8 +458,8 @@ class BatchProcessor:
             current_step += 1
             self._call_progress(current_step, total_steps,
                                 f"🚀 全局初始化: {global_pre_name}")
-            print(f'🚀 执行全局初始化...（{global_pre_name}）')
-            if self._is_cancelled():
+            status_logger.info(f'🚀 执行全局初始化...（{global_pre_name}）')
+            if self._is_cancelled(force=True):
                 return context
             try:
                 if global_pre_name in self._pre_processors:
@@ -132,23 +467,26 @@ class BatchProcessor:
                     # moved to optional built-in processors (e.g. record_to_shared)
                     result = self._pre_processors[global_pre_name](
                         context, **config_pre)
-                    print('✅ 全局初始化完成!')
+                    status_logger.info('✅ 全局初始化完成!')
                 else:
-                    print(f"⚠️ 未注册的全局初始化函数: {global_pre_name}")
+                    status_logger.warning(f"⚠️ 未注册的全局初始化函数: {global_pre_name}")
             except Exception as e:
-                print(f"❌ 全局初始化失败: {e}\n{traceback.format_exc()}")
+                self._log_failure(e, f"❌ 全局初始化失败: {e}")
                 # 不中断，继续处理
 
         # === 递归处理所有路径 ===
-        step_counter = [current_step]  # mutable reference
-        self._process_path_recursive(root, context, step_counter, total_steps)
+        step_counter = itertools.count(current_step + 1)  # yields next step index
+        try:
+            self._process_path_recursive(root, context, step_counter,
+                                         total_steps)
+        finally:
+            self._walk_cache = {}
 
         # === 全局 post_process ===
-        if not self._is_cancelled() and global_post_name:
-            step_counter[0] += 1
-            self._call_progress(step_counter[0], total_steps,
+        if global_post_name and not self._is_cancelled(force=True):
+            self._call_progress(next(step_counter), total_steps,
                                 f"🏁 全局收尾: {global_post_name}")
-            print(f"🏁 执行全局最终处理: {global_post_name}")
+            status_logger.info(f"🏁 执行全局最终处理: {global_post_name}")
             try:
                 if global_post_name in self._post_processors:
                     # Call the global post-processor. Post-run recording
@@ -156,7 +494,7 @@ class BatchProcessor:
                     result = self._post_processors[global_post_name](
                         context, **config_post)
             except Exception as e:
-                print(f"❌ 全局最终处理失败: {e}\n{traceback.format_exc()}")
+                self._log_failure(e, f"❌ 全局最终处理失败: {e}")
 
         return context
 
@@ -180,6 +518,7 @@ class BatchProcessor:
             raise FileNotFoundError(f"路径不存在: {root}")
 
         self.root_path = root
+        self._compile_rules()
 
         actions: List[Dict] = []
 
@@ -191,17 +530,9 @@ class BatchProcessor:
             global_pre_name, config_pre = self._get_pre_config()
             global_post_name, config_post = self._get_post_config()
 
-        def _walk(p: Path):
+        def _walk(p: Path, rel: str, is_dir: bool):
             nonlocal actions, step_counter, steps
-            is_dir = p.is_dir()
-            rules = self._get_processors_for_path(p, is_dir)
-
-            # build action record
-            rel = None
-            try:
-                rel = p.relative_to(self.root_path).as_posix()
-            except Exception:
-                rel = str(p)
+            rules = self._get_processors_for_path(p, is_dir, rel)
 
             action = {
                 "path":
@@ -260,13 +591,10 @@ class BatchProcessor:
                 return
 
             if is_dir:
-                try:
-                    for child in sorted(p.iterdir()):
-                        if max_items is not None and len(actions) >= max_items:
-                            return
-                        _walk(child)
-                except (PermissionError, OSError):
-                    pass
+                for child, child_is_dir in _scandir_children(p):
+                    if max_items is not None and len(actions) >= max_items:
+                        return
+                    _walk(child, _child_rel(rel, child.name), child_is_dir)
 
             if sequence and passed_filter:
                 # after children, append post processors for this path
@@ -294,7 +622,7 @@ class BatchProcessor:
                     'config': config_pre,
                 })
 
-            _walk(root)
+            _walk(root, ".", root.is_dir())
 
             if global_post_name:
                 step_counter += 1
@@ -310,177 +638,392 @@ class BatchProcessor:
             return {'total_steps': step_counter, 'steps': steps}
 
         else:
-            _walk(root)
+            _walk(root, ".", root.is_dir())
             return actions
 
     # ==================== PRIVATE HELPERS ====================
 
-    def _count_total_processor_calls(self, root: Path) -> int:
-        """遍历整棵树，统计所有 pre + post 处理器调用次数"""
-        total = 0
-
-        def _walk(p: Path):
-            nonlocal total
-            is_dir = p.is_dir()
-            rules = self._get_processors_for_path(p, is_dir)
-            total += len(rules.get("pre", [])) + len(rules.get(
-                "inline", [])) + len(rules.get("post", []))
-            if is_dir:
-                try:
-                    for child in sorted(p.iterdir()):
-                        _walk(child)
-                except (PermissionError, OSError):
-                    pass  # skip inaccessible dirs
-
-        _walk(root)
-        return total
-
-    def _process_path_recursive(self, path: Path, context: ProcessingContext,
-                                step_counter: List[int],
-                                total_steps: int) -> None:
-        is_dir = path.is_dir()
-        rules = self._get_processors_for_path(path, is_dir)
-        pre_procs = rules.get("pre", []) + rules.get("inline", [])
-        post_procs = rules.get("post", [])
-
-        # Pre-visit
-        if pre_procs:
-            self._execute_processor_list_with_progress(pre_procs, path,
-                                                       context, is_dir, "pre",
-                                                       step_counter,
-                                                       total_steps)
-
-        # Recurse into children (if dir)
-        if is_dir:
-            try:
-                children = sorted(path.iterdir())
-            except (PermissionError, OSError):
-                children = []
-            for child in children:
-                if self._is_cancelled():
-                    return
-                self._process_path_recursive(child, context, step_counter,
-                                             total_steps)
-
-        # Post-visit
-        if post_procs:
-            self._execute_processor_list_with_progress(post_procs, path,
-                                                       context, is_dir, "post",
-                                                       step_counter,
-                                                       total_steps)
-
-    def _get_processors_for_path(
-            self, path: Path,
-            is_dir: bool) -> Dict[str, List[Tuple[str, Dict]]]:
+    def _walk_tree(
+        self, root: Path
+    ) -> Dict[Path, Tuple[bool, Dict, List[Tuple[Path, bool]]]]:
+        """单次遍历整棵树，记录每个路径的 (is_dir, rules, children)。
 
-        # 收集所有候选规则（带优先级）
-        candidates = {"pre": [], "post": [], "inline": []}
+        children 为 (path, is_dir) 列表，取自 os.scandir 的目录项，不再对每个条目 stat。
+        结果保存在 `self._walk_cache` 中，`_process_path_recursive` 直接复用，
+        避免第二次列目录和规则匹配。
+        """
+        cache = self._walk_cache = {}
+
+        def _walk(p: Path, rel: str, is_dir: bool):
+            rules = self._get_processors_for_path(p, is_dir, rel)
+            children = _scandir_children(p, self._stat_sink) if is_dir else []
+            cache[p] = (is_dir, rules, children)
+            for child, child_is_dir in children:
+                _walk(child, _child_rel(rel, child.name), child_is_dir)
+
+        _walk(root, ".", root.is_dir())
+        return cache
+
+    def _process_path_recursive(self,
+                                path: Path,
+                                context: ProcessingContext,
+                                step_counter: Iterator[int],
+                                total_steps: int,
+                                is_dir: Optional[bool] = None,
+                                rel_path: Optional[str] = None) -> None:
+        """先序执行 pre/inline，子项全部处理完后再执行目录的 post。
+
+        用显式栈代替递归：栈项为 (path, rel_path, is_dir, pending)。pending 为
+        None 表示待访问；为处理器列表表示该目录的子项已处理完，只剩 post 阶段；
+        为 future 元组表示需等待交给线程池的文件（parallel_workers > 1 时）。
+        rel_path 由父目录逐级拼接，匹配规则和写元信息都直接使用。
+        """
+        if rel_path is None:
+            rel_path = self._rel_posix(path)
+        stack: List[Tuple[Path, Optional[str], Optional[bool],
+                          Any]] = [(path, rel_path, is_dir, None)]
+        while stack:
+            if self._is_cancelled():
+                return
+            path, rel, is_dir, pending = stack.pop()
 
-        for pattern, rule in self.config.items():
-            if pattern in ("pre_process", "post_process", "config_pre",
-                           "config_post"):
+            # Files handed to the thread pool: wait for them before the
+            # directory's post-visit
+            if isinstance(pending, tuple):
+                for fut in pending:
+                    fut.result()
                 continue
-            if not isinstance(rule, dict):
+
+            # Post-visit (children drained)
+            if pending is not None:
+                if self._is_cancelled(force=True):
+                    return
+                self._execute_processor_list_with_progress(
+                    pending, path, context, is_dir, "post", step_counter,
+                    total_steps, rel)
                 continue
 
-            if self._match_rule(path, pattern, is_dir):
-                config = rule.get("config", {})
-                priority = rule.get("priority", 0)
+            cached = self._walk_cache.pop(path, None)
+            if cached is not None:
+                is_dir, rules, children = cached
+            else:
+                if is_dir is None:
+                    is_dir = path.is_dir()
+                rules = self._get_processors_for_path(path, is_dir, rel)
+                children = None
 
-                #      must_execute = rule.get("must_execute", False)must_execute
+            if not is_dir:
+                self._execute_item(path, rel, False, rules, context,
+                                   step_counter, total_steps)
+                continue
 
-                def add_to_list(lst, procs):
-                    for p in procs:
-                        lst.append((p, config, priority))
+            pre_procs = rules["bound_pre"]
+            post_procs = rules["bound_post"]
+
+            # Pre-visit
+            if pre_procs:
+                self._execute_processor_list_with_progress(
+                    pre_procs, path, context, is_dir, "pre", step_counter,
+                    total_steps, rel)
+
+            # post marker first, then children reversed so they pop in order
+            if post_procs:
+                stack.append((path, rel, is_dir, post_procs))
+            if children is None:
+                children = _scandir_children(path, self._stat_sink)
+            children = [
+                (child, None if rel is None else _child_rel(rel, child.name),
+                 child_is_dir) for child, child_is_dir in children
+            ]
+            if self._pool is not None:
+                children = self._submit_parallel_files(
+                    children, context, step_counter, total_steps, stack,
+                    (path, rel, is_dir))
+            stack.extend((child, child_rel, child_is_dir, None)
+                         for child, child_rel, child_is_dir in reversed(children))
+
+    def _execute_item(self, path: Path, rel: Optional[str], is_dir: bool,
+                      rules: Dict, context: ProcessingContext,
+                      step_counter: Iterator[int], total_steps: int) -> None:
+        """Run a leaf item's pre/inline then post processors."""
+        if rules["bound_pre"]:
+            self._execute_processor_list_with_progress(
+                rules["bound_pre"], path, context, is_dir, "pre",
+                step_counter, total_steps, rel)
+        if rules["bound_post"]:
+            self._execute_processor_list_with_progress(
+                rules["bound_post"], path, context, is_dir, "post",
+                step_counter, total_steps, rel)
+
+    def _submit_parallel_files(self, children: List[Tuple[Path, Optional[str],
+                                                          bool]],
+                               context: ProcessingContext,
+                               step_counter: Iterator[int], total_steps: int,
+                               stack: List, parent: Tuple) -> List:
+        """Submit child files whose rules are all `parallel_safe` to the pool.
+
+        A wait marker for them is pushed onto `stack` (popped after the
+        remaining children, before the parent's post-visit). Returns the
+        children that still run serially, in order.
+        """
+        serial = []
+        futures = []
+        for child, child_rel, child_is_dir in children:
+            if not child_is_dir:
+                cached = self._walk_cache.get(child)
+                rules = (cached[1] if cached is not None else
+                         self._get_processors_for_path(child, False, child_rel))
+                if rules.get("parallel_safe"):
+                    self._walk_cache.pop(child, None)
+                    futures.append(
+                        self._pool.submit(self._execute_item, child,
+                                          child_rel, False, rules, context,
+                                          step_counter, total_steps))
+                    continue
+            serial.append((child, child_rel, child_is_dir))
+        if futures:
+            stack.append((*parent, tuple(futures)))
+        return serial
+
+    def _rel_posix(self, path: Path) -> Optional[str]:
+        """POSIX path relative to root_path ('.' for the root), None if
+        `path` is outside the root."""
+        try:
+            rel = path.relative_to(self.root_path).as_posix()
+        except ValueError:
+            return None
+        return rel if rel else "."
 
-                if "processors" in rule:
-                    add_to_list(candidates["inline"], rule["processors"])
-                if "pre_processors" in rule:
-                    add_to_list(candidates["pre"], rule["pre_processors"])
-                if "post_processors" in rule:
-                    add_to_list(candidates["post"], rule["post_processors"])
+    def _get_processors_for_path(
+            self,
+            path: Path,
+            is_dir: bool,
+            rel_path: Optional[str] = None) -> Dict[str, List[Tuple[str, Dict]]]:
+        """Resolve the (pre, inline, post) processors for `path`.
+
+        `rel_path` is the POSIX path relative to `root_path` ('.' for the
+        root). Tree walkers build it incrementally from the parent's value
+        and pass it in; it is only derived from `path` when omitted.
+        """
+        if self._compiled_rules is None:
+            self._compile_rules()
+
+        if rel_path is None:
+            rel_path = self._rel_posix(path)
+            if rel_path is None:
+                return self._resolve_rules(None, is_dir)
+
+        # 匹配结果只取决于 (相对路径, 是否目录)，配置不变时跨 simulate/run 复用
+        key = (rel_path, is_dir)
+        rules = self._rules_memo.get(key)
+        if rules is None and not is_dir and self._suffix_cacheable:
+            # 同目录下同扩展名的文件命中的规则必然相同（大多是一条都不命中）
+            parent, _, name = rel_path.rpartition('/')
+            dot = name.rfind('.')
+            suffix = name[dot:] if dot > 0 and dot < len(name) - 1 else ''
+            if _GLOB_IGNORECASE:
+                suffix = suffix.lower()
+            skey = (parent or '.', name.startswith('.'), suffix)
+            rules = self._ruleset_cache.get(skey)
+            if rules is None:
+                rules = self._ruleset_cache[skey] = self._resolve_rules(
+                    rel_path, is_dir)
+            return rules
+        if rules is None:
+            rules = self._resolve_rules(rel_path, is_dir)
+            if len(self._rules_memo) >= _RULES_MEMO_MAXSIZE:
+                self._rules_memo.clear()
+            self._rules_memo[key] = rules
+        return rules
+
+    def _resolve_rules(
+            self, rel_path: Optional[str],
+            is_dir: bool) -> Dict[str, List[Tuple[str, Dict]]]:
+        # 命中规则的下标组合（签名）决定最终结果；同目录下的同类文件通常签名相同，
+        # 排序/合并只需按签名做一次
+        if rel_path is None:
+            signature = ()
+        else:
+            # 只检查字面前缀可能命中的规则：无前缀的规则 + 首级目录同名的桶
+            key = rel_path.lower() if _GLOB_IGNORECASE else rel_path
+            bucket = self._rule_buckets.get(key.split('/', 1)[0])
+            candidates = (sorted(self._unprefixed_rules + bucket)
+                          if bucket else self._unprefixed_rules)
+            compiled = self._compiled_rules
+            signature = tuple(
+                i for i in candidates
+                if (not (cr := compiled[i]).prefix or key.startswith(
+                    cr.prefix + '/')) and self._match_rule(
+                        rel_path, cr.pattern, cr.matcher, cr.dir_only, is_dir))
+        result = self._signature_memo.get(signature)
+        if result is None:
+            result = self._build_rules(signature)
+            self._signature_memo[signature] = result
+        return result
 
-        # 对每类处理器按优先级排序，返回最终列表（不去重）
+    def _build_rules(
+            self, signature: Tuple[int, ...]
+    ) -> Dict[str, List[Tuple[str, Dict]]]:
+        rules = [self._compiled_rules[i] for i in signature]
         result = {}  # phase -> list of (name, config)
-        for phase in ["pre", "inline", "post"]:
-            procs = candidates[phase]
-            if not procs:
-                result[phase] = []
-                continue
-
-            sorted_procs = sorted(candidates[phase], key=lambda x: -x[2])
-            result[phase] = [(name, cfg) for name, cfg, _ in sorted_procs]
+        for phase in ("pre", "inline", "post"):
+            # 各规则的列表在编译时已展开为 (name, config, priority)
+            procs = [t for cr in rules for t in getattr(cr, phase)]
+            # 只有多条规则且优先级不同时才需要排序（稳定排序，保持配置顺序）
+            if len({t[2] for t in procs}) > 1:
+                procs.sort(key=lambda x: -x[2])
+            result[phase] = [(name, cfg) for name, cfg, _ in procs]
+
+        # built-in recorders (decided once in `_compile_rules`)
+        rec_name, persist_name = self._builtin_recorders
+        if rec_name and all(n != rec_name for n, _ in result["inline"]):
+            result["inline"].append((rec_name, {}))
+        if persist_name and all(n != persist_name
+                                for n, _ in result["post"]):
+            result["post"].append((persist_name, {}))
+
+        # callables bound once per signature for the executor:
+        # (name, func or None if unregistered, config); pre and inline run
+        # back to back so they share one list
+        registry = self._processors
+        result["bound_pre"] = [(name, registry.get(name), cfg)
+                               for name, cfg in result["pre"] + result["inline"]]
+        result["bound_post"] = [(name, registry.get(name), cfg)
+                                for name, cfg in result["post"]]
+        # a file may run in the thread pool only if every matched rule opted
+        # in; injected recorders write shared state, so they opt out
+        result["parallel_safe"] = (bool(rules)
+                                   and all(cr.parallel_safe for cr in rules)
+                                   and rec_name is None
+                                   and persist_name is None)
+        return result
 
-        # Optionally inject built-in recorders when enabled in top-level config
+    def _compile_rules(self) -> None:
+        """Compile every rule pattern once so per-path matching is a plain
+        regex match instead of re-parsing the glob for each (path, rule).
+
+        When the config is unchanged since the last compile, the compiled
+        rules and the per-path memo are kept as-is."""
+        if (self._compiled_rules is not None
+                and self._compiled_config == self.config
+                and self._compiled_registry == self._processors):
+            return
+        self._rules_memo.clear()
+        self._signature_memo.clear()
+        compiled = []
+        for pattern, rule in self.config.items():
+            if pattern in _META_KEYS:
+                continue
+            # rules without any processor list can never contribute; drop
+            # them here so the per-path loop only sees real rules
+            if not isinstance(rule, dict) or not any(k in rule
+                                                     for k in _PROC_KEYS):
+                continue
+            if pattern == ".":
+                cr = CompiledRule(pattern, None, False)
+            else:
+                # === 模式以 / 结尾 → 匹配目录本身（支持 *, ?, **, [...]）===
+                dir_only = pattern.endswith('/')
+                cr = CompiledRule(pattern, _compile_pattern(pattern, dir_only),
+                                  dir_only,
+                                  _literal_prefix(pattern.rstrip('/')))
+            cr.parallel_safe = bool(rule.get("parallel_safe", False))
+            config = rule.get("config", {})
+            priority = rule.get("priority", 0)
+            #      must_execute = rule.get("must_execute", False)must_execute
+            for attr, key in (("inline", "processors"),
+                              ("pre", "pre_processors"),
+                              ("post", "post_processors")):
+                if key in rule:
+                    # names from the config are interned like registered ones
+                    getattr(cr, attr).extend(
+                        (sys.intern(p) if isinstance(p, str) else p, config,
+                         priority) for p in rule[key])
+            compiled.append(cr)
+        self._compiled_rules = compiled
+        self._rule_buckets = {}
+        self._unprefixed_rules = []
+        self._ruleset_cache = {}
+        self._suffix_cacheable = all(
+            cr.dir_only or cr.pattern == "." or _suffix_only(cr.pattern)
+            for cr in compiled)
+        for i, cr in enumerate(compiled):
+            if cr.prefix:
+                self._rule_buckets.setdefault(cr.prefix.split('/', 1)[0],
+                                              []).append(i)
+            else:
+                self._unprefixed_rules.append(i)
+        self._builtin_recorders = self._resolve_builtin_recorders()
+        self._compiled_config = copy.deepcopy(self.config)
+        # plugins may register processors between runs; rebind when they do
+        self._compiled_registry = dict(self._processors)
+
+    def _resolve_builtin_recorders(
+            self) -> Tuple[Optional[str], Optional[str]]:
+        """Optionally inject built-in recorders when enabled in top-level
+        config; only registered processors are injected."""
         try:
-            if self.config.get('enable_builtin_recorders'):
-                br = self.config.get('builtin_recorders', {}) or {}
-                rec_name = br.get('record', 'record_to_shared')
-                persist_name = br.get('persist', 'persist_history_sqlite')
-
-                # inline recorder (per-file/per-path quick record)
-                if rec_name and rec_name in self._processors:
-                    names = [n for n, _ in result.get('inline', [])]
-                    if rec_name not in names:
-                        result.setdefault('inline', []).append((rec_name, {}))
-
-                # post-run persistence
-                if persist_name and persist_name in self._processors:
-                    names = [n for n, _ in result.get('post', [])]
-                    if persist_name not in names:
-                        result.setdefault('post', []).append(
-                            (persist_name, {}))
+            if not self.config.get('enable_builtin_recorders'):
+                return None, None
+            br = self.config.get('builtin_recorders', {}) or {}
+            # inline recorder (per-file/per-path quick record)
+            rec_name = br.get('record', 'record_to_shared')
+            # post-run persistence
+            persist_name = br.get('persist', 'persist_history_sqlite')
+            return (rec_name if rec_name in self._processors else None,
+                    persist_name
+                    if persist_name in self._processors else None)
         except Exception:
             # non-fatal: misconfiguration should not break rule matching
-            pass
-
-        return result
-
-    def _match_rule(self, path: Path, pattern: str, is_dir: bool) -> bool:
-        try:
-            rel_path = path.relative_to(self.root_path).as_posix()
-        except ValueError:
-            return False
+            return None, None
 
+    def _match_rule(self, rel_path: str, pattern: str, matcher: Any,
+                    dir_only: bool, is_dir: bool) -> bool:
         if pattern == ".":
-            return str(path) == str(self.root_path)
+            return rel_path == "."
 
-        # === 模式以 / 结尾 → 匹配目录本身（支持 *, ?, **, [...]）===
-        if pattern.endswith('/'):
-            if not is_dir:
-                return False
-            pattern_base = pattern.rstrip('/')
-            # 允许 ** 出现在目录匹配中！
-            return glob.globmatch(
-                rel_path,
-                pattern_base,
-                flags=glob.GLOBSTAR  #
-            )
-
-        # === 普通模式 → 匹配文件或目录（也支持 **）===
-        else:
-            return glob.globmatch(rel_path, pattern, flags=glob.GLOBSTAR)
+        if dir_only and not is_dir:
+            return False
+        if matcher is None:
+            matcher = _compile_pattern(pattern, dir_only)
+        # 允许 ** 出现在目录匹配中！
+        return matcher.match(rel_path)
 
     def _execute_processor_list_with_progress(
-            self, procs: List[Tuple[str, Dict]], path: Path,
+            self, procs: List[Tuple[str, Optional[Callable], Dict]], path: Path,
             context: ProcessingContext, is_dir: bool, phase: str,
-            step_counter: List[int], total_steps: int):
-        rel_path = path.relative_to(
-            self.root_path) if path != self.root_path else Path(".")
-        parts = list(rel_path.parts) if rel_path != Path(".") else ["."]
-        parts_key = [p + '/' for p in parts[:-1]] + [parts[-1]]
-
-        metadata_info = [[], [], [], None, [], []]
-        context.set_metadata(parts_key, metadata_info)
-
-        for proc_name, config in procs:
+            step_counter: Iterator[int], total_steps: int,
+            rel_path: Optional[str] = None):
+        # metadata key: parent dirs carry a trailing '/', root is ('.',)
+        if rel_path is None:
+            parts = path.relative_to(self.root_path).parts
+        elif rel_path == ".":
+            parts = ()
+        else:
+            parts = rel_path.split("/")
+        if parts:
+            meta_key = tuple(f"{p}/" for p in parts[:-1]) + (parts[-1], )
+        else:
+            meta_key = (".", )
+
+        metadata_info = ItemMeta()
+        context.metadata_flat[meta_key] = metadata_info
+
+        item_type = _ITEM_DIR if is_dir else _ITEM_FILE
+        # the status line is only built when someone consumes it: a progress
+        # callback, the status log, or status_logger (verbose and INFO enabled)
+        log_status = self.verbose and status_logger.isEnabledFor(logging.INFO)
+        announce = bool(self.progress_callback
+                        or self.status_log_enabled or log_status)
+        for proc_name, proc_func, config in procs:
             if self._is_cancelled():
                 break
 
-            step_counter[0] += 1
-            step_idx = step_counter[0]
-            item_type = "📁目录" if is_dir else "📄文件"
-            status = f"{item_type} {path.name} → {proc_name} ({phase})"
+            with self._step_lock:
+                step_idx = next(step_counter)
+                if announce:
+                    status = f"{item_type} {path.name} → {proc_name} ({phase})"
+                    self._call_progress(step_idx, total_steps, status)
             # emit per-step started event if worker provided
             try:
                 if hasattr(self, 'worker') and getattr(
@@ -493,17 +1036,16 @@ class BatchProcessor:
             except Exception:
                 pass
 
-            self._call_progress(step_idx, total_steps, status)
-            print(status)
+            if log_status:
+                status_logger.info(status)
 
-            metadata_info[0].append(proc_name)
-            metadata_info[1].append(config)
+            metadata_info.processors.append(proc_name)
+            metadata_info.configs.append(config)
 
-            if proc_name in self._processors:
+            if proc_func is not None:
                 try:
-                    result = self._processors[proc_name](path, context,
-                                                         **config)
-                    metadata_info[2].append('succeed')
+                    result = proc_func(path, context, **config)
+                    metadata_info.statuses.append('succeed')
                     # emit per-step finished(success)
                     try:
                         if hasattr(self, 'worker') and getattr(
@@ -518,11 +1060,9 @@ class BatchProcessor:
                         pass
                 except Exception as e:
                     error_msg = f"{proc_name}: {e}"
-                    print(
-                        f"❌ 处理失败 [{proc_name} on {path}]: {e}\n{traceback.format_exc()}"
-                    )
-                    metadata_info[2].append('failed')
-                    metadata_info[4].append(error_msg)
+                    self._log_failure(e, f"❌ 处理失败 [{proc_name} on {path}]: {e}")
+                    metadata_info.statuses.append('failed')
+                    metadata_info.errors.append(error_msg)
                     # emit per-step finished(failed)
                     try:
                         if hasattr(self, 'worker') and getattr(
@@ -538,9 +1078,9 @@ class BatchProcessor:
 
             else:
                 warn_msg = f"{proc_name}: 未注册处理器"
-                print(f"⚠️ {warn_msg}")
-                metadata_info[2].append('failed')
-                metadata_info[4].append(warn_msg)
+                status_logger.warning(f"⚠️ {warn_msg}")
+                metadata_info.statuses.append('failed')
+                metadata_info.warnings.append(warn_msg)
                 # emit per-step finished(failed)
                 try:
                     if hasattr(self, 'worker') and getattr(
@@ -1,5 +1,7 @@
 # decorators.py
-from typing import Callable, Dict, Any, List, Union, Tuple, Iterable
+import os
+import sys
+from typing import Callable, ClassVar, Dict, Any, List, Union, Tuple, Iterable
 from dataclasses import dataclass, field
 from pathlib import Path
 
@@ -12,23 +14,111 @@ from utils.nested_dicts import (
 )
 
 
+# 单个路径的执行记录（对应 ProcessingContext.meta_colnames 的六列）
+@dataclass(slots=True)
+class ItemMeta:
+    processors: List[str] = field(default_factory=list)  # 处理函数
+    configs: List[Dict[str, Any]] = field(default_factory=list)  # 输入变量
+    statuses: List[str] = field(default_factory=list)  # 执行情况
+    order: Any = None  # 执行顺序
+    warnings: List[str] = field(default_factory=list)  # 警告信息
+    errors: List[str] = field(default_factory=list)  # 错误信息
+
+    # 字段名 -> 显示列名（顺序即 as_list 的列顺序）
+    COLUMNS: ClassVar[Dict[str, str]] = {
+        'processors': '处理函数',
+        'configs': '输入变量',
+        'statuses': '执行情况',
+        'order': '执行顺序',
+        'warnings': '警告信息',
+        'errors': '错误信息',
+    }
+
+    def as_list(self) -> List[Any]:
+        """按 meta_colnames 的列顺序返回"""
+        return [
+            self.processors, self.configs, self.statuses, self.order,
+            self.warnings, self.errors
+        ]
+
+    def as_dict(self) -> Dict[str, Any]:
+        """以显示列名为键返回"""
+        return dict(zip(self.COLUMNS.values(), self.as_list()))
+
+
+# 逐项结果的列名（add_result_item 的列式存储）
+RESULT_COLUMNS = ("phase", "path", "type", "processor", "config", "result")
+
+
 # 上下文对象：函数间传递数据的“背包”
 @dataclass
 class ProcessingContext:
     root_path = None  ##批处理的根目录 Path对象
     meta_colnames: List[str] = field(
-        default_factory=lambda:
-        ['处理函数', '输入变量', '执行情况', '执行顺序', '警告信息', '错误信息'])
+        default_factory=lambda: list(ItemMeta.COLUMNS.values()))
     data: Dict[str, Any] = field(default_factory=dict)  # 存储任意数据
     results: List[Any] = field(default_factory=list)  # 收集处理结果
     metadata: Dict[str, Any] = field(default_factory=dict)  # 元信息
+    # 引擎写入的逐路径执行记录：(父目录/, ..., 名称) 元组 -> ItemMeta，
+    # 一次哈希即可存取，不再为每层目录创建嵌套 dict
+    metadata_flat: Dict[Tuple[str, ...], Any] = field(default_factory=dict)
     shared: Dict[str, Any] = field(default_factory=dict)  # 全局共享数据
+    # add_result 维护的二级索引：处理器名 -> 结果；路径及其各级上级目录（至 root_path）-> 结果
+    # （直接 results.append 的结果不会进入索引）
+    _results_by_processor: Dict[Any, List[Any]] = field(default_factory=dict,
+                                                         repr=False)
+    _results_path_prefix: Dict[str, List[Any]] = field(default_factory=dict,
+                                                       repr=False)
+    # 本次运行的 stat 缓存：路径字符串 -> os.stat_result（遍历时先存 DirEntry，用到时才 stat）
+    stat_cache: Dict[str, Any] = field(default_factory=dict)
+    # 逐项结果按列存储（每列一个 list），避免每条结果一个 dict
+    result_columns: Dict[str, List[Any]] = field(
+        default_factory=lambda: {c: [] for c in RESULT_COLUMNS})
+    # 运行结束时的收尾回调：key -> func(context)，见 on_run_end
+    _run_end_hooks: Dict[Any, Callable] = field(default_factory=dict,
+                                                repr=False)
 
     def clear(self):
         self.data.clear()
         self.results.clear()
+        self._results_by_processor.clear()
+        self._results_path_prefix.clear()
         self.metadata.clear()
+        self.metadata_flat.clear()
         self.shared.clear()
+        self.stat_cache.clear()
+        self._run_end_hooks.clear()
+        for col in self.result_columns.values():
+            col.clear()
+
+    def on_run_end(self, key: Any, func: Callable) -> None:
+        """登记运行结束时调用的 func(context)，同一 key 只登记一次
+
+        引擎在 run 返回前调用（取消或出错时也会调用），按登记的逆序执行，
+        供处理器落盘运行期间保持打开的资源，无需额外配置全局 post_process。
+        """
+        self._run_end_hooks.setdefault(key, func)
+
+    def pop_run_end_hooks(self) -> List[Tuple[Any, Callable]]:
+        """取出全部收尾回调（按应执行的顺序，即登记的逆序）"""
+        hooks = list(self._run_end_hooks.items())
+        self._run_end_hooks.clear()
+        hooks.reverse()
+        return hooks
+
+    def stat(self, path: Any) -> os.stat_result:
+        """带缓存的 os.stat（跟随符号链接，与 Path.stat() 相同）
+
+        引擎遍历目录时已登记 DirEntry，Windows 上其 stat 无需再次系统调用。
+        """
+        key = str(path)
+        st = self.stat_cache.get(key)
+        if st is None:
+            st = os.stat(key)
+        elif not isinstance(st, os.stat_result):
+            st = st.stat()
+        self.stat_cache[key] = st
+        return st
 
     def set_data(self, keys: Any, value: Any):
         set_dict_data(self.data, keys, value)
@@ -42,6 +132,56 @@ class ProcessingContext:
     #
     def add_result(self, result: Any):
         self.results.append(result)
+        if not isinstance(result, dict):
+            return
+        self._results_by_processor.setdefault(result.get("processor"),
+                                              []).append(result)
+        p = result.get("path")
+        if isinstance(p, str) and p:
+            # 登记到路径本身及每一级上级目录（到本次运行的根目录为止），
+            # 按子树查询只需一次字典查找
+            index = self._results_path_prefix
+            root = str(self.root_path) if self.root_path is not None else None
+            while True:
+                index.setdefault(p, []).append(result)
+                parent = os.path.dirname(p)
+                if p == root or not parent or parent == p:
+                    break
+                p = parent
+
+    def results_by_processor(self, processor: str) -> List[Any]:
+        """add_result 登记的、指定处理器的结果"""
+        return self._results_by_processor.get(processor, [])
+
+    def results_under(self, path: Any, processor: str = None) -> List[Any]:
+        """add_result 登记的、path 为 `path` 或位于其子树下的结果
+
+        索引只建到 root_path 为止，root_path 之上的目录查不到根目录内的结果。
+        """
+        found = self._results_path_prefix.get(str(path), [])
+        if processor is None:
+            return list(found)
+        return [r for r in found if r.get("processor") == processor]
+
+    def add_result_item(self, phase: str, path: Any, type_: str, proc: str,
+                        cfg: Dict[str, Any], res: Any):
+        """按列追加一条结果（phase, path, type, processor, config, result）"""
+        cols = self.result_columns
+        cols["phase"].append(phase)
+        cols["path"].append(path)
+        cols["type"].append(type_)
+        cols["processor"].append(proc)
+        cols["config"].append(cfg)
+        cols["result"].append(res)
+
+    def iter_result_items(self) -> Iterable[Dict[str, Any]]:
+        """逐条还原为 dict（导出 JSON 等按行格式时使用）
+
+        导出表格可直接 results_to_dataframe(context.result_columns)
+        """
+        cols = [self.result_columns[c] for c in RESULT_COLUMNS]
+        for row in zip(*cols):
+            yield dict(zip(RESULT_COLUMNS, row))
 
     def update_metadata(self, **kwargs):
         self.metadata.update(kwargs)
@@ -50,11 +190,42 @@ class ProcessingContext:
         set_dict_data(self.metadata, keys, value)
 
     def get_metadata(self, keys: Any, default=None):
+        if isinstance(keys, list):
+            rec = self.metadata_flat.get(tuple(keys))
+            if rec is not None:
+                return rec
         return get_dict_data(self.metadata, keys, default)
 
+    def get_metadata_flat(self, key: Tuple[str, ...], default=None):
+        return self.metadata_flat.get(key, default)
+
     def setdefault_metadata(self, keys: Any, default=None):
         return setdefault_dict_data(self.metadata, keys, default)
 
+    def metadata_view(self) -> Dict[str, Any]:
+        """返回 metadata 的嵌套副本，ItemMeta 记录展开为按列排列的列表（供界面显示）
+
+        metadata_flat 中的记录在此时才按路径展开为嵌套结构。
+        """
+
+        def convert(node):
+            if isinstance(node, dict):
+                return {k: convert(v) for k, v in node.items()}
+            if isinstance(node, ItemMeta):
+                return node.as_list()
+            return node
+
+        view = convert(self.metadata)
+        for key, rec in self.metadata_flat.items():
+            node = view
+            for k in key[:-1]:
+                child = node.get(k)
+                if not isinstance(child, dict):
+                    child = node[k] = {}
+                node = child
+            node[key[-1]] = convert(rec)
+        return view
+
     ##设置共享数据，这里的keys是嵌套字典
     # ['key1', 'key2', 'key3']
     def set_shared(self, keys: Any, value: Any):
@@ -182,7 +353,8 @@ def processor(name: str = None,
     """
 
     def decorator(func):
-        proc_name = name or func.__name__
+        # 处理器名在配置、注册表和状态信息中反复使用，驻留后比较/哈希更快
+        proc_name = sys.intern(name or func.__name__)
         func.reload_info = ''
         if proc_name in PROCESSORS:
             func.reload_info = f'处理器{proc_name}已存在，将重载'
@@ -218,7 +390,8 @@ def pre_processor(name: str = None,
     """
 
     def decorator(func):
-        proc_name = name or func.__name__
+        # 处理器名在配置、注册表和状态信息中反复使用，驻留后比较/哈希更快
+        proc_name = sys.intern(name or func.__name__)
         func.reload_info = ''
         if proc_name in PRE_PROCESSORS:
             func.reload_info = f'前处理器{proc_name}已存在，将重载'
@@ -249,7 +422,8 @@ def post_processor(name: str = None,
     """
 
     def decorator(func):
-        proc_name = name or func.__name__
+        # 处理器名在配置、注册表和状态信息中反复使用，驻留后比较/哈希更快
+        proc_name = sys.intern(name or func.__name__)
         func.reload_info = ''
         if proc_name in POST_PROCESSORS:
             func.reload_info = f'后处理器{proc_name}已存在，将重载'
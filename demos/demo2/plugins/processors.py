@@ -1,6 +1,7 @@
 # processors/my_processors.py
 from decorators.processor import processor
 from pathlib import Path
+import stat
 
 @processor(name="mark_enter", priority=80, metadata={"description": "进入路径前做标记"})
 def mark_enter(path: Path, context, **cfg):
@@ -9,7 +10,8 @@ def mark_enter(path: Path, context, **cfg):
 
 @processor(name="scan_file", priority=60, metadata={"description": "统计行数"})
 def scan_file(path: Path, context, **cfg):
-    if path.is_file():
+    # 使用遍历时缓存的 stat，避免再次 stat 文件
+    if stat.S_ISREG(context.stat(path).st_mode):
         try:
             lines = path.read_text(encoding="utf-8", errors="ignore").splitlines()
             return {"file": str(path), "lines": len(lines)}
@@ -26,10 +28,7 @@ def mark_exit(path: Path, context, **cfg):
 def summarize_dir(path: Path, context, **cfg):
     if not path.is_dir():
         return {"path": str(path), "skipped": True}
-    count = 0
-    for r in context.results:
-        if r.get("processor") == "scan_file" and r.get("phase") in ("pre","post"):
-            # 统计在此目录子树下的文件
-            if r.get("path", "").startswith(str(path)):
-                count += 1
+    # 统计在此目录子树下的文件（按路径索引查询，不再扫描全部结果）
+    count = sum(1 for r in context.results_under(path, "scan_file")
+                if r.get("phase") in ("pre", "post"))
     return {"dir": str(path), "scanned_files_in_subtree": count}
\ No newline at end of file
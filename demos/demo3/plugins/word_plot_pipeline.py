@@ -3,37 +3,96 @@
 Dependencies: matplotlib, python-docx. The processors handle missing dependencies gracefully.
 Usage: reference these processor names in config rules via pre_processors/processors/post_processors.
 """
+from array import array
 from pathlib import Path
 from typing import List, Dict, Any
 from decorators.processor import processor
 from utils.pipeline import (
     ensure_dir,
     get_bucket,
-    append_numbers,
     get_or_create_doc,
     set_output,
 )
-from utils.adapters.docx_helpers import get_or_create_doc as adapter_get_doc
+from utils.adapters.docx_helpers import get_cached_doc, checkpoint_doc
+from utils.adapters.plot_helpers import minmax_downsample, reused_axes, write_png
+import csv
+import fnmatch
+import io
+import json
 import os
+import re
 import time
 
+import numpy as np
+import pandas as pd
+
 # 强制使用非交互后端，需在任何 matplotlib 导入前设置
 os.environ.setdefault("MPLBACKEND", "Agg")
 
+# 依赖只在插件加载时导入一次，处理器读取 _PACKAGES_OK 并直接使用模块级名称。
+# 不导入 pyplot，避免激活 GUI 后端；绘图经 plot_helpers.reused_axes 使用 Figure + Agg canvas，防止线程相关的 GUI 崩溃
+try:
+    from docx.shared import Inches
+    from matplotlib.figure import Figure  # noqa: F401
+    from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: F401
+    _PACKAGES_OK, _PACKAGES_ERR = True, None
+except Exception as e:
+    _PACKAGES_OK, _PACKAGES_ERR = False, e
+
 
-def _ensure_packages():
-    """Ensure required packages; do NOT import pyplot to avoid GUI backend activation.
+# 逐行解析用到的正则在模块加载时编译一次
+_SPLIT_COMMA_WS = re.compile(r"[,\s]+")
+_ALPHA_COMMA_DIGIT = re.compile(r"[A-Za-z]+,\d+")
 
-    Uses Figure + Agg canvas explicitly later. This prevents thread-related GUI crashes.
+# Pillow 后备绘图的圆点模板：圆心取整后与 draw.ellipse([x-3, y-3, x+3, y+3]) 覆盖相同像素的 (dy, dx) 偏移
+_DOT_OFFSETS = tuple(zip(*[(dy, dx) for dy in range(-3, 4) for dx in range(-3, 4)
+                           if dx * dx + dy * dy <= 10]))
+
+def _csv_numbers(src) -> array:
+    """用 pandas 切分 CSV 并按行展开为数值，结果与 csv.reader 逐格 float() 一致
+
+    跳过第一条记录（表头），不把任何列当作索引；所有字段按字符串读取后统一转换（非数字跳过）。
+    比第一行数据更宽的行会让 pandas 抛 ParserError，由调用方退回 csv.reader 逐行解析；
+    较窄的行补的是空字段，转换时同样被跳过。
     """
+    df = pd.read_csv(src, header=None, skiprows=1, index_col=False, dtype=str,
+                     na_filter=False)
+    vals = array('d')
+    _extend_floats(vals, df.to_numpy(dtype=object).ravel().tolist())
+    return vals
+
+def _folder_values(context, folder: str):
+    """把 read_data_files 暂存的分块合并进 folder_data 桶并返回（每个目录只合并一次）"""
+    chunks = context.get_data(["folder_chunks"], {}).pop(folder, None)
+    if chunks:
+        bucket = get_bucket(context, ["folder_data", folder], array('d'))
+        for chunk in chunks:
+            bucket.extend(chunk)
+    return context.get_data(["folder_data", folder], [])
+
+# 纯数字 TXT / CSV 每批转换的行数（限制流式读取时的内存占用）
+_TXT_BATCH_LINES = 65536
+
+
+def _extend_numbers(vals: array, lines: List[str]) -> None:
+    """把一批文本行中的数字追加到 vals：整批交给 numpy 转换，混有非数字字段时逐个转换"""
+    if not lines:
+        return
+    _extend_floats(vals, _SPLIT_COMMA_WS.split("\n".join(lines)))
+
+
+def _extend_floats(vals: array, parts) -> None:
+    """把字段逐个按 float() 的规则转换后追加到 vals（非数字跳过）；全部可转换时一次交给 numpy"""
     try:
-        import matplotlib  # noqa: F401
-        from docx import Document  # noqa: F401
-        from matplotlib.figure import Figure  # noqa: F401
-        from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: F401
-        return True, None
-    except Exception as e:
-        return False, e
+        vals.frombytes(np.array(parts, dtype=np.float64).tobytes())
+        return
+    except ValueError:
+        pass
+    for part in parts:
+        try:
+            vals.append(float(part))
+        except Exception:
+            pass
 
 
 @processor(name="enter_dir_write_word", priority=80, source=__file__, metadata={
@@ -45,16 +104,15 @@ def _ensure_packages():
 def enter_dir_write_word(path: Path, context, **cfg):
     if not path.is_dir():
         return {"skipped": True}
-    ok, err = _ensure_packages()
-    if not ok:
-        return {"error": f"missing packages: {err}"}
-    from docx import Document
+    if not _PACKAGES_OK:
+        return {"error": f"missing packages: {_PACKAGES_ERR}"}
 
     out_doc = Path(cfg.get("doc_path", "./output.docx"))
-    doc = Document(out_doc) if out_doc.exists() else Document()
+    # 文档在整个运行期间保持打开（缓存在 context.shared），按检查点保存，运行结束时由引擎统一落盘
+    doc, _ = get_cached_doc(context, out_doc)
     doc.add_heading(f"进入目录: {path.name}", level=2)
     doc.add_paragraph(f"路径: {path}")
-    doc.save(out_doc)
+    checkpoint_doc(context, out_doc)
     # track doc path in shared
     context.set_shared(["word_doc"], str(out_doc))
     set_output(context, "enter_dir", "doc_path", str(out_doc))
@@ -69,59 +127,89 @@ def enter_dir_write_word(path: Path, context, **cfg):
 })
 def read_data_files(path: Path, context, **cfg):
     # If called on a directory, read all files matching pattern; if on a file, just read that file.
-    import csv, json, re
     pattern = cfg.get("pattern", "*")
     key = cfg.get("key", "values")
-    collected: List[float] = get_bucket(context, ["folder_data", str(path)], [])
+    collected = get_bucket(context, ["folder_data", str(path)], array('d'))
 
-    def read_one(file_path: Path):
-        vals = []
+    def read_one(file_path: Path) -> array:
+        vals = array('d')
         try:
-            text = file_path.read_text(encoding="utf-8", errors="ignore")
-            # CSV
-            if file_path.suffix == ".csv" or text.strip().startswith("category,") or "," in text.splitlines()[0]:
-                reader = csv.reader(text.splitlines())
-                header = next(reader, None)
-                for row in reader:
-                    for v in row:
-                        try:
-                            vals.append(float(v))
-                        except Exception:
-                            pass
-                return vals
-            # JSON
-            if text.strip().startswith("[") or text.strip().startswith("{"):
-                try:
-                    data = json.loads(text)
-                    # 支持列表或字典
-                    if isinstance(data, list):
-                        for item in data:
-                            if isinstance(item, dict):
-                                for k, v in item.items():
-                                    if isinstance(v, (int, float)):
-                                        vals.append(v)
-                                    elif isinstance(v, dict):
-                                        for vv in v.values():
-                                            if isinstance(vv, (int, float)):
-                                                vals.append(vv)
-                    elif isinstance(data, dict):
-                        for v in data.values():
-                            if isinstance(v, (int, float)):
-                                vals.append(v)
-                            elif isinstance(v, list):
-                                for vv in v:
-                                    if isinstance(vv, (int, float)):
-                                        vals.append(vv)
-                except Exception:
-                    pass
-                return vals
-            # 混合格式
-            if "CSV:" in text or "JSON:" in text:
-                for line in text.splitlines():
+            # 逐行流式读取，不把整个文件读进内存；格式只根据开头几行判断
+            with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+                first = head = f.readline()
+                while head and not head.strip():
+                    head = f.readline()
+                head = head.lstrip()
+                # CSV：交给 pandas 的 C 解析器切分；行宽不一致等解析失败时退回 csv.reader
+                if file_path.suffix == ".csv" or head.startswith("category,") or "," in first:
+                    f.seek(0)
+                    try:
+                        return _csv_numbers(f)
+                    except Exception:
+                        f.seek(0)
+                    reader = csv.reader(f)
+                    header = next(reader, None)
+                    cells, rows = [], 0
+                    for row in reader:
+                        cells.extend(row)
+                        rows += 1
+                        if rows >= _TXT_BATCH_LINES:
+                            _extend_floats(vals, cells)
+                            cells, rows = [], 0
+                    _extend_floats(vals, cells)
+                    return vals
+                # JSON（需要完整文档）
+                if head.startswith(("[", "{")):
+                    f.seek(0)
+                    try:
+                        data = json.load(f)
+                        # 支持列表或字典
+                        if isinstance(data, list):
+                            for item in data:
+                                if isinstance(item, dict):
+                                    for k, v in item.items():
+                                        if isinstance(v, (int, float)):
+                                            vals.append(v)
+                                        elif isinstance(v, dict):
+                                            for vv in v.values():
+                                                if isinstance(vv, (int, float)):
+                                                    vals.append(vv)
+                        elif isinstance(data, dict):
+                            for v in data.values():
+                                if isinstance(v, (int, float)):
+                                    vals.append(v)
+                                elif isinstance(v, list):
+                                    for vv in v:
+                                        if isinstance(vv, (int, float)):
+                                            vals.append(vv)
+                    except Exception:
+                        pass
+                    return vals
+                # TXT: 多列数字（逗号或空格分隔），跳过注释行，按批交给 numpy 转换；
+                # 同一遍里检查混合格式标记（可能出现在任意行），遇到再回到开头按混合格式解析
+                f.seek(0)
+                batch = []
+                for line in f:
+                    if "CSV:" in line or "JSON:" in line:
+                        break
+                    line = line.strip()
+                    if not line or line.startswith("#"):
+                        continue
+                    batch.append(line)
+                    if len(batch) >= _TXT_BATCH_LINES:
+                        _extend_numbers(vals, batch)
+                        batch = []
+                else:
+                    _extend_numbers(vals, batch)
+                    return vals
+                # 混合格式
+                del vals[:]
+                f.seek(0)
+                for line in f:
                     line = line.strip()
                     if line.startswith("CSV:"):
                         continue
-                    if re.match(r"^[A-Za-z]+,\d+", line):
+                    if _ALPHA_COMMA_DIGIT.match(line):
                         parts = line.split(",")
                         for v in parts[1:]:
                             try:
@@ -137,27 +225,22 @@ def read_data_files(path: Path, context, **cfg):
                                         vals.append(v)
                         except Exception:
                             pass
-                    if re.match(r"^\d+$", line):
+                    if line.isdecimal():
                         vals.append(float(line))
                 return vals
-            # TXT: 多列数字
-            for line in text.splitlines():
-                line = line.strip()
-                if not line or line.startswith("#"):
-                    continue
-                # 逗号或空格分隔
-                for part in re.split(r",|\s+", line):
-                    try:
-                        vals.append(float(part))
-                    except Exception:
-                        pass
         except Exception:
-            return []
+            return array('d')
         return vals
 
     files = []
     if path.is_dir():
-        files = list(path.glob(pattern))
+        if "/" in pattern or "\\" in pattern or "**" in pattern:
+            files = [f for f in path.glob(pattern) if f.is_file()]
+        else:
+            # 单层模式直接用 scandir：目录项自带类型信息，省去每个文件一次 stat
+            with os.scandir(path) as it:
+                files = [Path(e.path) for e in it
+                         if e.is_file() and fnmatch.fnmatch(e.name, pattern)]
     elif path.is_file():
         files = [path]
 
@@ -166,10 +249,8 @@ def read_data_files(path: Path, context, **cfg):
         vals = read_one(f)
         if not vals:
             continue
-        # 将文件数据归并到所属目录键，确保目录退出时可绘图
-        if f.is_file():
-            dir_key = ["folder_data", str(f.parent)]
-            append_numbers(context, dir_key, vals)
+        # 每个文件的数组先按所属目录暂存（只追加引用），目录退出时一次性合并到 folder_data
+        context.setdefault_data(["folder_chunks", str(f.parent)], []).append(vals)
         collected.extend(vals)
         added += len(vals)
 
@@ -185,66 +266,84 @@ def read_data_files(path: Path, context, **cfg):
 def plot_on_exit_paste_word(path: Path, context, **cfg):
     if not path.is_dir():
         return {"skipped": True}
-    ok, err = _ensure_packages()
-    if not ok:
-        return {"error": f"missing packages: {err}"}
+    if not _PACKAGES_OK:
+        return {"error": f"missing packages: {_PACKAGES_ERR}"}
     # 调试日志文件（写入磁盘便于分析闪退前阶段）
+    # 默认先缓存在内存、处理器结束时一次性追加；排查闪退时设 debug_log_sync: true 逐条落盘
     debug_dir = ensure_dir(Path(cfg.get("debug_dir", "./debug_logs")))
     log_file = debug_dir / f"debug_{path.name}.log"
-    def _log_step(msg: str):
+    log_sync = bool(cfg.get("debug_log_sync", False))
+    log_lines: List[str] = []
+    # 时间戳只格式化一次，之后每行记相对起点的秒数
+    t0 = time.monotonic()
+    ts = time.strftime('%H:%M:%S')
+
+    def _write_log(lines: List[str]):
         try:
             with open(log_file, 'a', encoding='utf-8') as lf:
-                lf.write(f"[{time.strftime('%H:%M:%S')}] {msg}\n")
+                lf.writelines(lines)
         except Exception:
             pass
 
-    _log_step("BEGIN plot_on_exit_paste_word")
-    _log_step(f"Values count: {len(context.get_data(['folder_data', str(path)], []))}")
+    def _log_step(msg: str):
+        line = f"[{ts}+{time.monotonic() - t0:.3f}s] {msg}\n"
+        if log_sync:
+            _write_log([line])
+        else:
+            log_lines.append(line)
 
-    # 先准备数据
-    from docx import Document
-    from docx.shared import Inches
+    try:
+        return _plot_and_paste(path, context, cfg, log_file, _log_step)
+    finally:
+        if log_lines:
+            _write_log(log_lines)
 
-    values = context.get_data(["folder_data", str(path)], [])
+
+def _plot_and_paste(path: Path, context, cfg: Dict[str, Any], log_file: Path, log_step):
+    log_step("BEGIN plot_on_exit_paste_word")
+
+    # 先准备数据
+    values = _folder_values(context, str(path))
+    log_step(f"Values count: {len(values)}")
     if not values:
-        _log_step("No data available; writing placeholder")
+        log_step("No data available; writing placeholder")
         # 写入占位“离开目录”说明（用户希望看到离开信息）
         doc_path_placeholder = Path(context.get_shared(["word_doc"], cfg.get("doc_path", "./output.docx"))).resolve()
         try:
-            from docx import Document
-            doc_ph = Document(doc_path_placeholder) if doc_path_placeholder.exists() else Document()
+            doc_ph, _ = get_cached_doc(context, doc_path_placeholder)
             doc_ph.add_heading(f"离开目录: {path.name}", level=3)
             doc_ph.add_paragraph("无数据可绘图。")
-            doc_ph.save(doc_path_placeholder)
+            checkpoint_doc(context, doc_path_placeholder)
         except Exception as e:
-            _log_step(f"Placeholder write failed: {e}")
+            log_step(f"Placeholder write failed: {e}")
         return {"path": str(path), "info": "no data", "doc": str(doc_path_placeholder)}
 
     # 选择绘图方式：优先 matplotlib，失败则 Pillow 后备
     use_pillow = cfg.get("force_pillow", False)
-    img_dir = Path(cfg.get("img_dir", "./images"))
-    img_dir.mkdir(parents=True, exist_ok=True)
-    img_path = (img_dir / f"plot_{path.name}.png").resolve()
+    # PNG 在内存中生成后直接插入文档；配置了 img_dir 时另存一份到磁盘
+    img_path = None
+    if cfg.get("img_dir"):
+        img_dir = Path(cfg["img_dir"])
+        img_dir.mkdir(parents=True, exist_ok=True)
+        img_path = (img_dir / f"plot_{path.name}.png").resolve()
 
     def _render_with_matplotlib():
-        from matplotlib.figure import Figure
-        from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
-        fig = Figure(figsize=(cfg.get("fig_width", 4), cfg.get("fig_height", 3)), dpi=cfg.get("dpi", 100))
-        ax = fig.add_subplot(111)
-        ax.plot(values, marker="o")
-        ax.set_title(f"数据曲线: {path.name}")
-        ax.grid(True)
-        fig.tight_layout()
-        canvas = FigureCanvas(fig)
-        canvas.draw()
-        fig.savefig(img_path)
-        return True
+        # 点数远超像素宽度时先降采样（保留每个分箱的极值）
+        xs, ys = minmax_downsample(values, int(cfg.get("fig_width", 4) * cfg.get("dpi", 100) * 2))
+        buf = io.BytesIO()
+        with reused_axes((cfg.get("fig_width", 4), cfg.get("fig_height", 3)), cfg.get("dpi", 100)) as (fig, ax):
+            ax.plot(xs, ys, marker="o")
+            ax.set_title(f"数据曲线: {path.name}")
+            ax.grid(True)
+            fig.tight_layout()
+            fig.savefig(buf, format="png")
+        return buf.getvalue()
 
     def _render_with_pillow():
         try:
             from PIL import Image, ImageDraw, ImageFont
         except Exception as e:
-            _log_step(f"Pillow import failed: {e}")
+            log_step(f"Pillow import failed: {e}")
             return False
         W, H = int(cfg.get("px_width", 600)), int(cfg.get("px_height", 400))
         im = Image.new("RGB", (W, H), (255, 255, 255))
@@ -255,65 +354,69 @@ def plot_on_exit_paste_word(path: Path, context, **cfg):
         if not values:
             draw.text((margin, margin), "NO DATA", fill=(0, 0, 0))
         else:
-            vmin, vmax = min(values), max(values)
+            idx, v = minmax_downsample(values, W * 2)
+            vmin, vmax = v.min(), v.max()
             rng = vmax - vmin if vmax != vmin else 1.0
-            pts = []
-            for i, v in enumerate(values):
-                x = margin + i / max(1, len(values) - 1) * plot_w
-                y = margin + (1 - (v - vmin) / rng) * plot_h
-                pts.append((x, y))
+            xs = margin + idx / max(1, len(values) - 1) * plot_w
+            ys = margin + (1 - (v - vmin) / rng) * plot_h
             # 轴
             draw.rectangle([margin, margin, margin + plot_w, margin + plot_h], outline=(0, 0, 0))
-            if len(pts) > 1:
-                draw.line(pts, fill=(30, 120, 200), width=2)
-            for x, y in pts:
-                draw.ellipse([x - 3, y - 3, x + 3, y + 3], fill=(200, 50, 50))
+            if len(v) > 1:
+                draw.line(np.column_stack((xs, ys)).ravel().tolist(), fill=(30, 120, 200), width=2)
+            # 数据点：在像素数组上一次性盖印圆点，而不是逐点调用 draw.ellipse
+            px = np.asarray(im).copy()
+            oy, ox = _DOT_OFFSETS
+            rows = np.clip(np.rint(ys).astype(np.intp)[:, None] + oy, 0, H - 1)
+            cols = np.clip(np.rint(xs).astype(np.intp)[:, None] + ox, 0, W - 1)
+            px[rows, cols] = (200, 50, 50)
+            im = Image.fromarray(px)
+            draw = ImageDraw.Draw(im)
             title = f"数据曲线: {path.name}"
             try:
                 font = ImageFont.load_default()
                 draw.text((margin, 5), title, fill=(0, 0, 0), font=font)
             except Exception:
                 draw.text((margin, 5), title, fill=(0, 0, 0))
-        im.save(img_path)
-        return True
+        buf = io.BytesIO()
+        im.save(buf, format="PNG")
+        return buf.getvalue()
 
-    render_ok = False
+    png = None
     if not use_pillow:
         try:
-            _log_step("Attempt matplotlib render")
-            render_ok = _render_with_matplotlib()
+            log_step("Attempt matplotlib render")
+            png = _render_with_matplotlib()
         except Exception as e:
-            _log_step(f"Matplotlib render failed: {e}; fallback Pillow")
+            log_step(f"Matplotlib render failed: {e}; fallback Pillow")
             use_pillow = True
-    if use_pillow and not render_ok:
-        render_ok = _render_with_pillow()
+    if use_pillow and not png:
+        png = _render_with_pillow()
 
-    if not render_ok or not img_path.exists():
-        _log_step("Image render failed")
-        return {"path": str(path), "error": "image_not_rendered", "img": str(img_path)}
+    img = str(img_path) if img_path else None
+    if not png:
+        log_step("Image render failed")
+        return {"path": str(path), "error": "image_not_rendered", "img": img}
+    if img_path:
+        write_png(img_path, png)
 
-    _log_step("Image rendered successfully")
+    log_step("Image rendered successfully")
 
     # paste into Word
-    if not img_path.exists():
-        _log_step("Image file missing after render")
-        return {"path": str(path), "error": f"image not created: {img_path}"}
-
     doc_path_cfg = context.get_shared(["word_doc"], cfg.get("doc_path", "./output.docx"))
-    # record path in context, then use adapter to open Document
+    # record path in context, then reuse the Document cached for this run
     doc_path = get_or_create_doc(context, doc_path_cfg)
-    from utils.adapters.docx_helpers import get_or_create_doc as _open_doc
-    doc, doc_path = _open_doc(str(doc_path))
+    doc, doc_path = get_cached_doc(context, doc_path)
     doc.add_heading(f"离开目录: {path.name}", level=3)
     doc.add_paragraph(f"文件数: {len(values)}；示例曲线如下：")
     try:
         width_in = cfg.get("img_width_inch", 4.0)
-        doc.add_picture(str(img_path), width=Inches(width_in))
-        _log_step("Picture added to document")
+        doc.add_picture(io.BytesIO(png), width=Inches(width_in))
+        log_step("Picture added to document")
     except Exception as e:
-        _log_step(f"Failed to add picture: {e}")
-        return {"doc": str(doc_path), "image": str(img_path), "action": "plot_paste_exit", "error": f"failed to add picture: {e}"}
-    doc.save(doc_path)
-    _log_step("Document saved successfully")
-    set_output(context, "plot_exit", "image_path", str(img_path))
-    return {"doc": str(doc_path), "image": str(img_path), "action": "plot_paste_exit", "debug_log": str(log_file)}
+        log_step(f"Failed to add picture: {e}")
+        return {"doc": str(doc_path), "image": img, "action": "plot_paste_exit", "error": f"failed to add picture: {e}"}
+    checkpoint_doc(context, doc_path)
+    log_step("Document updated")
+    set_output(context, "plot_exit", "image_path", img)
+    return {"doc": str(doc_path), "image": img, "action": "plot_paste_exit", "debug_log": str(log_file)}
+
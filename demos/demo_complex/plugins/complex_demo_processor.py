@@ -9,38 +9,217 @@ This plugin demonstrates:
 
 Dependencies: matplotlib, python-docx, Pillow
 """
+from array import array
 from pathlib import Path
 from typing import List, Dict, Any, Tuple
 from decorators.processor import processor
 from utils.pipeline import ensure_dir, get_bucket, set_output
 from utils.adapters.docx_helpers import (
-    get_or_create_doc,
-    save_doc,
+    get_cached_doc,
+    checkpoint_doc,
+    flush_cached_docs,
     docx_table_with_caption_and_merges,
     docx_insert_picture,
     docx_write_text,
+    docx_add_paragraphs,
+)
+from utils.adapters.plot_helpers import (
+    save_plot_png_values,
+    minmax_downsample,
+    reused_axes,
+    write_png,
 )
-from utils.adapters.plot_helpers import save_plot_png_values
 from processors.file_ops import set_path_name_dict
+from utils.three_type_data import parse_three_type_data, parse_and_plot
+import io
 import os
 import time
-import re
+
+import numpy as np
 
 # Force non-interactive backend before any matplotlib import
 os.environ.setdefault("MPLBACKEND", "Agg")
 
+# Import the Word/plotting dependencies once at plugin load: processors read
+# _PACKAGES_OK and use the module-level names, no imports in their bodies
+try:
+    from docx.shared import Inches
+    from matplotlib.figure import Figure  # noqa: F401
+    from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: F401
+    from PIL import Image  # noqa: F401
+    _PACKAGES_OK, _PACKAGES_ERR = True, None
+except Exception as e:
+    _PACKAGES_OK, _PACKAGES_ERR = False, e
+
+
+_FMT2 = "{:.2f}".format
+
+
+def _preview(values: np.ndarray, n: int) -> str:
+    """前 n 个值保留两位小数，超出时附总数（先 tolist 转成 Python float，格式化比逐个 np.float64 快一倍）"""
+    text = ", ".join(map(_FMT2, values[:n].tolist()))
+    if len(values) > n:
+        text += f" ... (共{len(values)}个)"
+    return text
+
+
+def _checkpoint_every(cfg: Dict[str, Any]) -> int:
+    """Intermediate saves of the live document; 0 (default) writes it once when the run ends."""
+    return int(cfg.get("doc_checkpoint_every", 0))
+
+
+# Longer series are min-max downsampled before plotting (curve outline and extremes kept)
+_MAX_PLOT_POINTS = 2000
+
+
+def _png_compress_level(cfg: Dict[str, Any]) -> int:
+    """zlib level for plot PNGs; 1 encodes noticeably faster than the default 6 for slightly larger files."""
+    return int(cfg.get("png_compress_level", 1))
+
+
+# Per-file parse + plot run in worker processes. Every spawned worker
+# re-imports numpy/matplotlib, so the default stays small.
+_DEFAULT_PLOT_WORKERS = min(4, os.cpu_count() or 1)
+
+
+def _plot_workers(cfg: Dict[str, Any]) -> int:
+    return int(cfg.get("plot_workers", _DEFAULT_PLOT_WORKERS))
+
+
+def _plot_pool(context, workers: int):
+    """This run's pool for `workers` processes, created on first use and shut down by _finish_run.
+
+    "spawn" avoids forking the (possibly multi-threaded, e.g. GUI) parent.
+    """
+    pools = context.setdefault_shared(["complex_demo", "plot_pools"], {})
+    pool = pools.get(workers)
+    if pool is None:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        pool = pools[workers] = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"))
+    return pool
+
+
+def _img_path(cfg: Dict[str, Any], name: str):
+    """PNG copy on disk only when img_dir is configured; otherwise images stay in memory."""
+    img_dir = cfg.get("img_dir")
+    if not img_dir:
+        return None
+    img_dir = Path(img_dir)
+    img_dir.mkdir(parents=True, exist_ok=True)
+    return img_dir / name
+
+
+def _place_plot(slot, png: bytes, caption: str):
+    """Fill a placeholder paragraph: picture goes right before it, the slot becomes the caption."""
+    if png:
+        slot.insert_paragraph_before().add_run().add_picture(
+            io.BytesIO(png), width=Inches(5.5))
+        slot.text = f"Figure: {caption}"
+    else:
+        slot.text = "绘图失败: 无法生成图片"
+        slot.style = "Normal"
+
+
+def _finish_file(context, entry: Dict[str, Any], type1, type2, type3, png):
+    """Serial part of read_three_type_data: table row, plot and folder bucket of one parsed file.
+
+    entry holds the file's paragraphs and the processor's result dict, which
+    gets the data counts here.
+    """
+    path, result = entry["path"], entry["result"]
+    if not (type1.size or type2.size or type3.size):
+        # the placeholders went in before the file was parsed
+        for para in entry["paragraphs"]:
+            para._element.getparent().remove(para._element)
+        result.update(skipped=True, reason="no_data", plot=None)
+        return
+
+    pending = context.setdefault_data(
+        ["complex_demo", "pending_rows", str(path.parent)],
+        {"doc": entry["doc"], "rows": []})
+    pending["rows"].append((path.name, _preview(type1, 10), _preview(type2, 5),
+                            _preview(type3, 5)))
+    _place_plot(entry["paragraphs"][-1], png, f"{path.name} 可视化")
+
+    folder_bucket = _folder_bucket(context, str(path.parent))
+    folder_bucket["type1"].frombytes(type1.tobytes())
+    folder_bucket["type2"].frombytes(type2.tobytes())
+    folder_bucket["type3"].frombytes(type3.tobytes())
+    folder_bucket["files"].append(path.name)
+
+    result.update(type1_count=len(type1), type2_count=len(type2),
+                  type3_count=len(type3))
+
+
+def _drain_files(context, folder_key: str = None):
+    """Collect pending worker results (of one folder, or all) in submission order and finish them."""
+    pending = context.get_shared(["complex_demo", "pending_files"], {})
+    for key in ([folder_key] if folder_key is not None else list(pending)):
+        for fut, entry in pending.pop(key, ()):
+            try:
+                parsed = fut.result()
+            except Exception:
+                # worker lost (e.g. broken pool): redo the file here
+                parsed = parse_and_plot(*entry["args"])
+            _finish_file(context, entry, *parsed)
+
+
+def _finish_run(context):
+    """Run-end hook (context.on_run_end): finish pending files, shut down the plot pools, write the documents.
 
-def _ensure_packages():
-    """Ensure required packages are available."""
+    Also runs when the run is cancelled or fails, so placeholders are filled
+    and the partial document is saved.
+    """
     try:
-        import matplotlib  # noqa: F401
-        from docx import Document  # noqa: F401
-        from matplotlib.figure import Figure  # noqa: F401
-        from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: F401
-        from PIL import Image  # noqa: F401
-        return True, None
-    except Exception as e:
-        return False, e
+        _drain_files(context)
+    finally:
+        for pool in context.get_shared(["complex_demo", "plot_pools"], {}).values():
+            pool.shutdown(wait=True, cancel_futures=True)
+        context.set_shared(["complex_demo", "plot_pools"], {})
+    # folders without exit_folder_summary still get their table
+    for folder_key in list(context.get_data(["complex_demo", "pending_rows"], {})):
+        _write_rows_table(context, folder_key)
+    flush_cached_docs(context)
+
+
+_ROW_HEADER = ["文件", "Type1 主要数据", "", "Type2 辅助数据1", "Type3 辅助数据2"]
+
+
+def _write_rows_table(context, folder_key: str, doc=None):
+    """Write the collected per-file rows of one folder as a single table."""
+    pending = context.get_data(["complex_demo", "pending_rows"], {}).pop(folder_key, None)
+    if not pending or not pending["rows"]:
+        return None
+    if doc is None:
+        doc, _ = get_cached_doc(context, pending["doc"])
+    rows = [[name, t1, "", t2, t3] for name, t1, t2, t3 in pending["rows"]]
+    # Type1 spans two columns in every row (0-based row/col, header is row 0)
+    merge_groups = [[(r, 1), (r, 2)] for r in range(len(rows) + 1)]
+    return docx_table_with_caption_and_merges(doc,
+                                              data=rows,
+                                              header=_ROW_HEADER,
+                                              caption=f"{Path(folder_key).name} 数据汇总",
+                                              merge_groups=merge_groups)
+
+
+def _folder_bucket(context, folder_key: str) -> Dict[str, Any]:
+    """Per-folder accumulator, kept in the flat complex_demo/_buckets map by folder path.
+
+    Numeric series are array('d') (unboxed doubles).
+    """
+    buckets = context.setdefault_shared(["complex_demo", "_buckets"], {})
+    bucket = buckets.get(folder_key)
+    if bucket is None:
+        bucket = buckets[folder_key] = {
+            "type1": array('d'),
+            "type2": array('d'),
+            "type3": array('d'),
+            "files": []
+        }
+    return bucket
 
 
 # Folder labels mapping
@@ -51,50 +230,18 @@ FOLDER_LABELS = {
 }
 
 
-def parse_three_type_data(
-        file_path: Path) -> Tuple[List[float], List[float], List[float]]:
-    """Parse file with 3 types of data.
-    
-    Returns:
-        Tuple of (type1_data, type2_data, type3_data)
-    """
-    type1_data = []
-    type2_data = []
-    type3_data = []
+def _rel_text(context, path: Path) -> str:
+    """path relative to context.root_path as text.
 
-    try:
-        text = file_path.read_text(encoding="utf-8", errors="ignore")
-        for line in text.splitlines():
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
-
-            if line.startswith("TYPE1:"):
-                # Extract numbers after TYPE1:
-                nums_str = line[6:].strip()
-                for num in re.split(r',\s*', nums_str):
-                    try:
-                        type1_data.append(float(num))
-                    except:
-                        pass
-            elif line.startswith("TYPE2:"):
-                nums_str = line[6:].strip()
-                for num in re.split(r',\s*', nums_str):
-                    try:
-                        type2_data.append(float(num))
-                    except:
-                        pass
-            elif line.startswith("TYPE3:"):
-                nums_str = line[6:].strip()
-                for num in re.split(r',\s*', nums_str):
-                    try:
-                        type3_data.append(float(num))
-                    except:
-                        pass
-    except Exception as e:
-        print(f"Error parsing file {file_path}: {e}")
-
-    return type1_data, type2_data, type3_data
+    The walker builds paths under the root, so slicing off the root prefix
+    gives the same text as str(path.relative_to(root)) without re-walking
+    the parts; anything else falls back to relative_to.
+    """
+    prefix = os.path.join(str(context.root_path), "")
+    text = str(path)
+    if text.startswith(prefix):
+        return text[len(prefix):]
+    return str(path.relative_to(context.root_path))
 
 
 @processor(name="enter_folder_label",
@@ -115,9 +262,8 @@ def enter_folder_label(path: Path, context, **cfg):
     if not path.is_dir():
         return {"skipped": True}
 
-    ok, err = _ensure_packages()
-    if not ok:
-        return {"error": f"missing packages: {err}"}
+    if not _PACKAGES_OK:
+        return {"error": f"missing packages: {_PACKAGES_ERR}"}
     # populate per-file labels using built-in processor if a _dict file exists
     try:
         set_path_name_dict(path,
@@ -128,22 +274,25 @@ def enter_folder_label(path: Path, context, **cfg):
         # non-fatal
         pass
 
-    # Document handling via adapter
+    # Document stays open in context.shared; written by _finish_run when the run ends
     out_doc_path = cfg.get("doc_path", "./demo_complex_output.docx")
-    doc, resolved = get_or_create_doc(Path(out_doc_path))
+    doc, resolved = get_cached_doc(context, out_doc_path)
+    context.on_run_end(_finish_run, _finish_run)
 
     # Folder label prefers mapping, falls back to folder name
     folder_name = path.name
     label = FOLDER_LABELS.get(folder_name, folder_name)
 
     # Add heading and path info
-    doc.add_heading(f"📁 {label}", level=2)
-    docx_write_text(doc, f"路径: {path.relative_to(context.root_path)}")
-    docx_write_text(doc, "")
-    save_doc(doc, resolved)
+    docx_add_paragraphs(doc, [(f"📁 {label}", "Heading 2"),
+                              (f"路径: {_rel_text(context, path)}", "Normal"),
+                              ("", "Normal")])
+    checkpoint_doc(context, resolved, _checkpoint_every(cfg))
 
     # Store doc path in shared context for downstream processors
     context.set_shared(["complex_demo", "doc_path"], str(resolved))
+    # Accumulator for this folder's files, ready before they are read
+    _folder_bucket(context, str(path))
 
     return {
         "doc": str(resolved),
@@ -168,122 +317,67 @@ def enter_folder_label(path: Path, context, **cfg):
         "Read files with 3 types of data, write to Word table, and create plot",
     })
 def read_three_type_data(path: Path, context, **cfg):
-    """Read file with 3 types of data, write to Word, and create individual plot."""
+    """Read file with 3 types of data, write to Word, and create individual plot.
+
+    With plot_workers > 1 (default: up to 4) parsing and plotting run in a
+    worker process; the file's heading, label and a plot placeholder are
+    written now, and the table row, picture and folder bucket are filled in
+    by exit_folder_summary / _finish_run in submission order.
+    """
     if not path.is_file():
         return {"skipped": True}
 
-    ok, err = _ensure_packages()
-    if not ok:
-        return {"error": f"missing packages: {err}"}
-
-    # Parse data
-    type1, type2, type3 = parse_three_type_data(path)
-
-    if not (type1 or type2 or type3):
-        return {"skipped": True, "reason": "no_data"}
+    if not _PACKAGES_OK:
+        return {"error": f"missing packages: {_PACKAGES_ERR}"}
+
+    img_path = _img_path(cfg, f"plot_{path.stem}.png")
+    args = (str(path), str(img_path) if img_path else None,
+            _png_compress_level(cfg), _MAX_PLOT_POINTS)
+    workers = _plot_workers(cfg)
+    fut = None
+    if workers > 1:
+        try:
+            fut = _plot_pool(context, workers).submit(parse_and_plot, *args)
+        except Exception:
+            fut = None  # pool unavailable: work inline below
+    parsed = None
+    if fut is None:
+        parsed = parse_and_plot(*args)
+        if not any(values.size for values in parsed[:3]):
+            return {"skipped": True, "reason": "no_data"}
 
     # Document handling via adapter
     doc_path = context.get_shared(["complex_demo", "doc_path"],
                                   cfg.get("doc_path",
                                           "./demo_complex_output.docx"))
-    doc, resolved = get_or_create_doc(Path(doc_path))
-
-    # Add file name as subheading
-    doc.add_heading(f"文件: {path.name}", level=3)
-
-    # Compose table using adapter and merge groups (0-based indices)
-    type1_str = ", ".join(f"{v:.2f}" for v in type1[:10])
-    if len(type1) > 10:
-        type1_str += f" ... (共{len(type1)}个)"
-    type2_str = ", ".join(f"{v:.2f}" for v in type2[:5])
-    if len(type2) > 5:
-        type2_str += f" ... (共{len(type2)}个)"
-    type3_str = ", ".join(f"{v:.2f}" for v in type3[:5])
-    if len(type3) > 5:
-        type3_str += f" ... (共{len(type3)}个)"
-
-    header = ["Type1 主要数据", "", "Type2 辅助数据1", "Type3 辅助数据2"]
-    data_row = [type1_str, "", type2_str, type3_str]
-    merge_groups = [[(0, 0), (0, 1)], [(1, 0), (1, 1)]]
-    # docx_table_with_caption_and_merges expects merge_groups as row/col tuples (0-based)
-    docx_table_with_caption_and_merges(doc,
-                                       data=[data_row],
-                                       header=header,
-                                       caption=f"{path.name} 数据",
-                                       merge_groups=merge_groups)
+    doc, resolved = get_cached_doc(context, doc_path)
+    context.on_run_end(_finish_run, _finish_run)
 
     # Per-file label (from set_path_name_dict) if available
     label_list = context.get_data(['labels', str(path)], []) or []
     label_text = ", ".join(label_list) if label_list else path.name
-    docx_write_text(doc, f"标签: {label_text}")
 
-    # Create individual combined plot (multiple series) using matplotlib inline
-    img_dir = Path(cfg.get("img_dir", "./demo_complex_images"))
-    img_dir.mkdir(parents=True, exist_ok=True)
-    img_path = img_dir / f"plot_{path.stem}.png"
-    try:
-        from matplotlib.figure import Figure
-        from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
-        fig = Figure(figsize=(6, 4), dpi=100)
-        ax = fig.add_subplot(111)
-        if type1:
-            ax.plot(type1,
-                    marker='o',
-                    label='Type1 主要数据',
-                    linewidth=2,
-                    markersize=4)
-        if type2:
-            ax.plot(type2,
-                    marker='s',
-                    label='Type2 辅助数据1',
-                    linewidth=1.5,
-                    markersize=4)
-        if type3:
-            ax.plot(type3,
-                    marker='^',
-                    label='Type3 辅助数据2',
-                    linewidth=1.5,
-                    markersize=4)
-        ax.set_title(f"数据曲线 - {path.stem}")
-        ax.set_xlabel("索引")
-        ax.set_ylabel("数值")
-        ax.legend()
-        ax.grid(True, alpha=0.3)
-        fig.tight_layout()
-        canvas = FigureCanvas(fig)
-        canvas.draw()
-        fig.savefig(img_path)
-        docx_insert_picture(doc,
-                            img_path,
-                            width_inches=5.5,
-                            caption=f"{path.name} 可视化")
-    except Exception:
-        docx_write_text(doc, "绘图失败: 无法生成图片")
-
-    save_doc(doc, resolved)
-
-    # Store data for folder summary
-    folder_key = str(path.parent)
-    folder_bucket = context.setdefault_data(
-        ["complex_demo", "folder_data", folder_key], {
-            "type1": [],
-            "type2": [],
-            "type3": [],
-            "files": []
-        })
-    folder_bucket["type1"].extend(type1)
-    folder_bucket["type2"].extend(type2)
-    folder_bucket["type3"].extend(type3)
-    folder_bucket["files"].append(path.name)
-
-    return {
+    # File name subheading, label, and a placeholder paragraph that keeps the
+    # picture's place in the document, appended together
+    heading, label_para, slot = docx_add_paragraphs(
+        doc, [(f"文件: {path.name}", "Heading 3"),
+              (f"标签: {label_text}", "Normal"),
+              ("", None)])
+    result = {
         "file": str(path),
-        "type1_count": len(type1),
-        "type2_count": len(type2),
-        "type3_count": len(type3),
-        "plot": str(img_path),
+        "plot": str(img_path) if img_path else None,
         "action": "read_three_type_data"
     }
+    entry = {"path": path, "doc": str(resolved), "args": args,
+             "paragraphs": (heading, label_para, slot), "result": result}
+    if fut is not None:
+        context.setdefault_shared(["complex_demo", "pending_files"], {}) \
+            .setdefault(str(path.parent), []).append((fut, entry))
+    else:
+        _finish_file(context, entry, *parsed)
+
+    checkpoint_doc(context, resolved, _checkpoint_every(cfg))
+    return result
 
 
 @processor(name="exit_folder_summary",
@@ -304,14 +398,16 @@ def exit_folder_summary(path: Path, context, **cfg):
     if not path.is_dir():
         return {"skipped": True}
 
-    ok, err = _ensure_packages()
-    if not ok:
-        return {"error": f"missing packages: {err}"}
+    if not _PACKAGES_OK:
+        return {"error": f"missing packages: {_PACKAGES_ERR}"}
+
+    # Files of this folder still in the workers must be finished before the summary
+    _drain_files(context, str(path))
 
     # Get folder data
     folder_key = str(path)
-    folder_data = context.get_data(["complex_demo", "folder_data", folder_key],
-                                   {})
+    # the folder is done: take its accumulator out of the context
+    folder_data = context.get_shared(["complex_demo", "_buckets"], {}).pop(folder_key, {})
     type1 = folder_data.get("type1", [])
     type2 = folder_data.get("type2", [])
     type3 = folder_data.get("type3", [])
@@ -323,16 +419,16 @@ def exit_folder_summary(path: Path, context, **cfg):
     doc_path = context.get_shared(["complex_demo", "doc_path"],
                                   cfg.get("doc_path",
                                           "./demo_complex_output.docx"))
-    doc, resolved = get_or_create_doc(Path(doc_path))
+    doc, resolved = get_cached_doc(context, doc_path)
 
     # Heading and summary
     folder_name = path.name
     label = FOLDER_LABELS.get(folder_name, folder_name)
-    doc.add_heading(f"📊 {label} - 总结", level=3)
 
-    type1_avg = sum(type1) / len(type1) if type1 else 0
-    type2_avg = sum(type2) / len(type2) if type2 else 0
-    type3_avg = sum(type3) / len(type3) if type3 else 0
+    # zero-copy float64 views over the array('d') accumulators
+    type1_avg = np.frombuffer(type1, dtype=np.float64).mean() if type1 else 0
+    type2_avg = np.frombuffer(type2, dtype=np.float64).mean() if type2 else 0
+    type3_avg = np.frombuffer(type3, dtype=np.float64).mean() if type3 else 0
     summary_text = (
         f"本目录共处理 {len(files)} 个文件。\n"
         f"- Type1 主要数据: {len(type1)} 个数据点\n"
@@ -340,56 +436,56 @@ def exit_folder_summary(path: Path, context, **cfg):
         f"- Type3 辅助数据2: {len(type3)} 个数据点\n\n"
         f"数据统计:\n- Type1 平均值: {type1_avg:.2f}\n- Type2 平均值: {type2_avg:.2f}\n- Type3 平均值: {type3_avg:.2f}"
     )
-    docx_write_text(doc, summary_text)
+    docx_add_paragraphs(doc, [(f"📊 {label} - 总结", "Heading 3"),
+                              (summary_text, "Normal")])
+    _write_rows_table(context, folder_key, doc)
 
     # Use adapter to create comprehensive plot (we'll combine series inline)
-    img_dir = Path(cfg.get("img_dir", "./demo_complex_images"))
-    img_dir.mkdir(parents=True, exist_ok=True)
-    img_path = img_dir / f"summary_{folder_name}.png"
+    img_path = _img_path(cfg, f"summary_{folder_name}.png")
     try:
-        from matplotlib.figure import Figure
-        from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
-        fig = Figure(figsize=(7, 5), dpi=120)
-        ax = fig.add_subplot(111)
-        if type1:
-            ax.plot(type1,
-                    marker='o',
-                    label=f'Type1 主要数据 (n={len(type1)})',
-                    linewidth=2.5,
-                    markersize=5,
-                    alpha=0.8)
-        if type2:
-            ax.plot(type2,
-                    marker='s',
-                    label=f'Type2 辅助数据1 (n={len(type2)})',
-                    linewidth=2,
-                    markersize=5,
-                    alpha=0.8)
-        if type3:
-            ax.plot(type3,
-                    marker='^',
-                    label=f'Type3 辅助数据2 (n={len(type3)})',
-                    linewidth=2,
-                    markersize=5,
-                    alpha=0.8)
-        ax.set_title(f"综合数据曲线 - {label}", fontsize=14, fontweight='bold')
-        ax.set_xlabel("数据索引", fontsize=11)
-        ax.set_ylabel("数值", fontsize=11)
-        ax.legend(loc='best', fontsize=10)
-        ax.grid(True, alpha=0.3, linestyle='--')
-        fig.tight_layout()
-        canvas = FigureCanvas(fig)
-        canvas.draw()
-        fig.savefig(img_path)
+        buf = io.BytesIO()
+        with reused_axes((7, 5), 120) as (fig, ax):
+            if type1:
+                ax.plot(*minmax_downsample(type1, _MAX_PLOT_POINTS),
+                        marker='o',
+                        label=f'Type1 主要数据 (n={len(type1)})',
+                        linewidth=2.5,
+                        markersize=5,
+                        alpha=0.8)
+            if type2:
+                ax.plot(*minmax_downsample(type2, _MAX_PLOT_POINTS),
+                        marker='s',
+                        label=f'Type2 辅助数据1 (n={len(type2)})',
+                        linewidth=2,
+                        markersize=5,
+                        alpha=0.8)
+            if type3:
+                ax.plot(*minmax_downsample(type3, _MAX_PLOT_POINTS),
+                        marker='^',
+                        label=f'Type3 辅助数据2 (n={len(type3)})',
+                        linewidth=2,
+                        markersize=5,
+                        alpha=0.8)
+            ax.set_title(f"综合数据曲线 - {label}", fontsize=14, fontweight='bold')
+            ax.set_xlabel("数据索引", fontsize=11)
+            ax.set_ylabel("数值", fontsize=11)
+            ax.legend(loc='best', fontsize=10)
+            ax.grid(True, alpha=0.3, linestyle='--')
+            fig.tight_layout()
+            fig.savefig(buf, format="png",
+                        pil_kwargs={"compress_level": _png_compress_level(cfg)})
+        if img_path:
+            write_png(img_path, buf.getbuffer())
+        buf.seek(0)
         docx_insert_picture(doc,
-                            img_path,
+                            buf,
                             width_inches=6.0,
                             caption=f"{label} 综合可视化")
     except Exception as e:
         docx_write_text(doc, f"综合绘图失败: {e}")
 
     docx_write_text(doc, "".join(["="] * 60))
-    save_doc(doc, resolved)
+    checkpoint_doc(context, resolved, _checkpoint_every(cfg))
 
     return {
         "folder": folder_name,
@@ -398,6 +494,7 @@ def exit_folder_summary(path: Path, context, **cfg):
         "type1_count": len(type1),
         "type2_count": len(type2),
         "type3_count": len(type3),
-        "summary_plot": str(img_path),
+        "summary_plot": str(img_path) if img_path else None,
         "action": "exit_folder_summary"
     }
+
@@ -1,5 +1,8 @@
+from array import array
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Dict, Any
+
+import numpy as np
 from decorators.processor import processor
 from utils.pipeline import get_bucket, append_numbers, record_result, set_output, get_output
 from utils.adapters.docx_helpers import (
@@ -34,45 +37,58 @@ def enter_folder_word(path: Path, context, doc_name: str = "nested_report.docx")
     folder_values = get_bucket(context, "folder_values")
     folder_key = str(path)
     folder_rows.setdefault(folder_key, [])
-    folder_values.setdefault(folder_key, [])
+    folder_values.setdefault(folder_key, array('d'))
     record_result(context, "ok", "enter folder", folder=folder_key)
     return {"folder": folder_key, "action": "entered"}
 
 
-def _extract_values(path: Path) -> List[float]:
+def _extract_values(path: Path) -> np.ndarray:
     if path.suffix.lower() == ".csv":
-        return csv_values(path)
+        return np.array(csv_values(path), dtype=np.float64)
     elif path.suffix.lower() == ".json":
         data = safe_read_json(path)
         if isinstance(data, dict):
             vals = data.get("values", [])
-            return [float(v) for v in vals if isinstance(v, (int, float))]
-        return []
+            # 纯数字列表由 numpy 推断出数值 dtype，整体转换；混有字符串/None/嵌套等时逐个过滤
+            if isinstance(vals, list):
+                try:
+                    arr = np.array(vals)
+                except ValueError:  # 长短不一的嵌套列表
+                    arr = None
+                if arr is not None and arr.ndim == 1 and arr.dtype.kind in "biuf":
+                    return arr.astype(np.float64)
+            return np.array([v for v in vals if isinstance(v, (int, float))], dtype=np.float64)
+        return np.empty(0)
     else:
-        text = safe_read_text(path)
+        tokens = safe_read_text(path).split()
+        if not tokens:
+            return np.empty(0)
+        # 整体交给 numpy 一次转换；含非数字 token 时才逐个转换并跳过
+        try:
+            return np.array(tokens, dtype=np.float64)
+        except ValueError:
+            pass
         nums = []
-        for token in text.split():
+        for token in tokens:
             try:
                 nums.append(float(token))
             except ValueError:
                 continue
-        return nums
+        return np.array(nums, dtype=np.float64)
 
 @processor(name="process_data_file", priority=60, type_hint="file", metadata={"desc": "提取数据并登记"})
 def process_data_file(path: Path, context):
     if not path.is_file() or path.suffix.lower() not in ALLOWED_SUFFIXES:
         return
-    # 判断是否叶子目录（可选：若父目录还有子目录则跳过）
     parent = path.parent
-    if any(p.is_dir() for p in parent.iterdir()):
-        # 若想处理非叶目录，可移除此判断
-        pass
     values = _extract_values(path)
+    # 一次 C 级归约得到 sum，mean 由它算出
+    total = float(values.sum())
     stats = {
         "file": str(path),
         "count": len(values),
-        "sum": sum(values) if values else 0.0,
-        "mean": (sum(values) / len(values)) if values else 0.0
+        "sum": total,
+        "mean": total / len(values) if len(values) else 0.0
     }
     # 全局记录
     records = get_bucket(context, "global_records")
@@ -82,7 +98,7 @@ def process_data_file(path: Path, context):
     folder_values = get_bucket(context, "folder_values")
     folder_key = str(parent)
     folder_rows.setdefault(folder_key, []).append(stats)
-    folder_values.setdefault(folder_key, []).extend(values)
+    folder_values.setdefault(folder_key, array('d')).frombytes(values.tobytes())
     record_result(context, "ok", "file processed", file=str(path), count=len(values))
     return stats
 
@@ -124,7 +140,7 @@ def folder_summary(path: Path, context, plot_width_inches: float = 4.5, dpi: int
         record_result(context, "error", f"plot failed: {e}", folder=folder_key)
 
     # 总结段落
-    docx_write_text(doc, f"Summary for {Path(folder_key).name}: files={len(rows)}, total_values={len(values)}, sum={sum(values):.2f}")
+    docx_write_text(doc, f"Summary for {Path(folder_key).name}: files={len(rows)}, total_values={len(values)}, sum={float(np.sum(values)):.2f}")
     save_doc(doc, resolved)
     record_result(context, "ok", "folder summarized", folder=folder_key, files=len(rows))
     return {"folder": folder_key, "files": len(rows), "values": len(values)}
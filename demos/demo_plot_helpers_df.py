@@ -17,7 +17,7 @@ Output:
     optionally other files if adapter produces them
 """
 from pathlib import Path
-import math
+import numpy as np
 import pandas as pd
 
 from utils.adapters import plot_helpers
@@ -28,13 +28,11 @@ OUT_DIR.mkdir(parents=True, exist_ok=True)
 # create example DataFrame
 n = 60
 dates = pd.date_range("2023-01-01", periods=n, freq="D")
+idx = np.arange(n, dtype=np.float64)
 df = pd.DataFrame({
-    "date":
-    dates,
-    "series_a": (pd.Series(range(n)) +
-                 (pd.Series(range(n)).apply(lambda x: math.sin(x / 6)))),
-    "series_b": (pd.Series(range(n)) +
-                 (pd.Series(range(n)).apply(lambda x: math.cos(x / 8))))
+    "date": dates,
+    "series_a": idx + np.sin(idx / 6),
+    "series_b": idx + np.cos(idx / 8),
 })
 
 
@@ -42,14 +40,15 @@ def extract_f_from_df(param):
     """Simple extractor used by generic_plot.
 
     Supported param values:
-    - 'index' -> returns the DataFrame index (datetime objects)
-    - column name (str) -> returns column values as a list
+    - 'index' -> returns the date column (datetime64 array)
+    - column name (str) -> returns the column values as an ndarray
+      (the column's own buffer, no per-value Python objects)
     """
     if isinstance(param, str):
         if param == 'index':
-            return df['date'].tolist()
+            return df['date'].to_numpy()
         if param in df.columns:
-            return df[param].tolist()
+            return df[param].to_numpy()
         raise KeyError(f"unknown param: {param}")
     raise TypeError("param must be a string column name or 'index'")
 
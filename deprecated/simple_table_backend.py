@@ -12,6 +12,9 @@ API:
 
 Storage model (simple list):
   self._records[dataname] = [ record1, record2, ... ]
+plus an index of the same record objects by table_id, so exact-id lookups
+and deletions do not scan the whole list:
+  self._by_id[dataname] = { table_id: [ record, ... ] }   # insertion order
 where record is:
   {
     'table_ref': {...},            # original dict (may be empty)
@@ -24,12 +27,13 @@ where record is:
 This implementation avoids any special handling for `__path__` — if callers
 include `__path__` in `table_ref` it will be treated like any other key.
 """
-from typing import Any, Dict, List, Tuple, Optional
+from typing import Any, Callable, Dict, List, Tuple, Optional
 import json
-import fnmatch
+import os
 import re
 
 from utils import nested_dicts as nd
+from deprecated.table_backend import _compile_glob, _compile_re
 
 
 class SimpleTableBackend:
@@ -37,6 +41,8 @@ class SimpleTableBackend:
     def __init__(self):
         # dataname -> list of records
         self._records: Dict[str, List[Dict[str, Any]]] = {}
+        # dataname -> table_id -> records with that id (same objects as in _records)
+        self._by_id: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
 
     # -- helpers ----------------------------------------------------------------
     def _normalize_table_ref(self, table_ref) -> Dict[str, Any]:
@@ -99,28 +105,40 @@ class SimpleTableBackend:
         # scalar
         return [[table]], []
 
-    def _val_matches(self, expected, actual) -> bool:
+    def _make_matcher(self, expected) -> Callable[[Any], bool]:
+        """Return a predicate for one selector value.
+
+        The selector kind (callable / re: / in: / glob / exact / collection /
+        equality) is resolved once here, not again for every value tested.
+        """
         if callable(expected):
-            try:
-                return bool(expected(actual))
-            except Exception:
-                return False
+            def match_callable(actual):
+                try:
+                    return bool(expected(actual))
+                except Exception:
+                    return False
+            return match_callable
         if isinstance(expected, str):
             if expected.startswith("re:") or expected.startswith("regex:"):
-                pat = expected.split(':', 1)[1]
                 try:
-                    return bool(re.search(pat, str(actual or "")))
+                    search = _compile_re(expected.split(':', 1)[1]).search
                 except re.error:
-                    return False
+                    return lambda actual: False
+                return lambda actual: search(str(actual or "")) is not None
             if expected.startswith("in:"):
                 sub = expected.split(':', 1)[1]
-                return sub in str(actual or "")
+                return lambda actual: sub in str(actual or "")
             if any(ch in expected for ch in "*?"):
-                return fnmatch.fnmatch(str(actual or ""), expected)
-            return str(actual) == expected
+                match = _compile_glob(expected).match
+                normcase = os.path.normcase
+                return lambda actual: match(normcase(str(actual or ""))) is not None
+            return lambda actual: str(actual) == expected
         if isinstance(expected, (list, tuple, set)):
-            return actual in expected
-        return expected == actual
+            return lambda actual: actual in expected
+        return lambda actual: expected == actual
+
+    def _val_matches(self, expected, actual) -> bool:
+        return self._make_matcher(expected)(actual)
 
     # -- public API -------------------------------------------------------------
     def write_table(self,
@@ -128,12 +146,10 @@ class SimpleTableBackend:
                     table_ref,
                     table,
                     extra_dict=None) -> Dict[str, Any]:
+        # _normalize_table_ref already returns a fresh dict; the whole ref (including
+        # any '__path__' key, not treated specially) is the table_keys
         ref = self._normalize_table_ref(table_ref)
-        # table_keys are everything except reserved keys; we treat none specially
-        tk = dict(ref) if isinstance(ref, dict) else {}
-        # do not specially pop '__path__' — keep it as a normal key for serialization
-        tk_for_id = dict(tk)
-        table_id = self._serialize_table_keys(tk_for_id or None)
+        table_id = self._serialize_table_keys(ref or None)
 
         rows, columns = self._table_to_rows_and_columns(table)
         rowcount = len(rows)
@@ -174,6 +190,7 @@ class SimpleTableBackend:
         }
 
         self._records.setdefault(dataname, []).append(rec)
+        self._by_id.setdefault(dataname, {}).setdefault(table_id, []).append(rec)
         return metadata or {}
 
     def get_tables(self,
@@ -184,12 +201,21 @@ class SimpleTableBackend:
         data_map: Dict[str, Any] = {}
         metadata_map: Dict[str, Any] = {}
 
-        recs = self._records.get(dataname, [])
+        matchers: Dict[Any, Callable[[Any], bool]] = {}
+        if selector is None or isinstance(selector, dict):
+            recs = self._records.get(dataname, [])
+            if selector:
+                # one predicate per selector key, shared by every record and row
+                matchers = {k: self._make_matcher(v) for k, v in selector.items()}
+        else:
+            # scalar selector matches the exact table_id: one index probe
+            recs = self._by_id.get(dataname, {}).get(str(selector), [])
 
         for rec in recs:
             rec_ref = rec.get('table_ref', {})
             rec_meta = rec.get('metadata', {})
-            rec_data = [list(r) for r in rec.get('rows', [])]
+            # stored rows are only read while matching; copied below for returned records
+            rec_data = rec.get('rows', [])
             cols = rec.get('columns') or []
             table_id = rec.get('table_id')
 
@@ -198,26 +224,22 @@ class SimpleTableBackend:
             if selector is None:
                 match_ok = True
             elif isinstance(selector, dict):
-                for sel_k, sel_v in selector.items():
+                for sel_k, matcher in matchers.items():
                     # do not treat '__path__' specially — it is just another key
                     if sel_k in rec_ref:
-                        if not self._val_matches(sel_v, rec_ref.get(sel_k)):
+                        if not matcher(rec_ref.get(sel_k)):
                             match_ok = False
                             break
                     elif sel_k in rec_meta:
-                        if not self._val_matches(sel_v, rec_meta.get(sel_k)):
+                        if not matcher(rec_meta.get(sel_k)):
                             match_ok = False
                             break
                     elif sel_k in cols:
                         idx = cols.index(sel_k)
-                        filtered_rows = []
-                        for row in rec_data:
-                            try:
-                                val = row[idx]
-                            except Exception:
-                                val = None
-                            if self._val_matches(sel_v, val):
-                                filtered_rows.append(row)
+                        filtered_rows = [
+                            row for row in rec_data
+                            if matcher(row[idx] if idx < len(row) else None)
+                        ]
                         if not filtered_rows:
                             match_ok = False
                             break
@@ -226,10 +248,7 @@ class SimpleTableBackend:
                         # unknown selector key -> non-match
                         match_ok = False
                         break
-            else:
-                # scalar selector: match exact table_id
-                if str(selector) != str(table_id):
-                    match_ok = False
+            # scalar selector: recs already holds only the records with that table_id
 
             if not match_ok:
                 continue
@@ -237,6 +256,8 @@ class SimpleTableBackend:
             # if rows filtered out completely, skip
             if not rec_data:
                 continue
+            # callers get their own row lists (the data map holds this list as is)
+            rec_data = [list(r) for r in rec_data]
 
             table_key = str(table_id)
             flat_data = nd.flatten_dict({'data': rec_data},
@@ -257,13 +278,17 @@ class SimpleTableBackend:
 
     def delete_table(self, dataname: str, table_ref) -> bool:
         ref = self._normalize_table_ref(table_ref)
-        tk = dict(ref) if isinstance(ref, dict) else {}
-        table_id = self._serialize_table_keys(tk or None)
-
-        recs = self._records.get(dataname, [])
-        for i, rec in enumerate(list(recs)):
-            if rec.get('table_id') == table_id and rec.get('table_ref') == ref:
-                recs.pop(i)
+        table_id = self._serialize_table_keys(ref or None)
+
+        same_id = self._by_id.get(dataname, {}).get(table_id, [])
+        for i, rec in enumerate(same_id):
+            if rec.get('table_ref') == ref:
+                same_id.pop(i)
+                if not same_id:
+                    del self._by_id[dataname][table_id]
+                recs = self._records[dataname]
+                # identity, not ==: equal records elsewhere in the list stay
+                recs.pop(next(j for j, r in enumerate(recs) if r is rec))
                 return True
         return False
 
@@ -7,19 +7,39 @@ It is intentionally lightweight and designed for tests and demos. The
 storage layout serializes `table_keys` to a JSON prefix so callers can
 select tables by the same dict shape used when writing.
 """
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Callable, Dict, Optional, Tuple
+import functools
 import json
 import fnmatch
+import os
 import re
 from threading import Lock
 
 
+# Selector patterns are compiled once and reused for every record/row they are
+# matched against (shared with simple_table_backend)
+@functools.lru_cache(maxsize=256)
+def _compile_re(pattern: str) -> re.Pattern:
+    return re.compile(pattern)
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_glob(pattern: str) -> re.Pattern:
+    """Glob -> regex; match it against os.path.normcase(name), as fnmatch.fnmatch does."""
+    return re.compile(fnmatch.translate(os.path.normcase(pattern)))
+
+
+# table_keys value types whose JSON form is determined by (type, value)
+_PLAIN_TYPES = (str, int, bool, type(None))
+
+
 class InMemoryTableBackend:
 
     def __init__(self):
-        # storage: dataname -> prefix -> list of records
-        # each record: { 'data': ..., 'metadata': ..., 'table_keys': ..., 'path': ... }
-        self._store: Dict[str, Dict[str, list]] = {}
+        # storage: dataname -> lookup key -> bucket
+        # each bucket: { 'prefix': serialized keys, 'keys': parsed keys, 'records': [...] }
+        # each record: { 'data': ..., 'metadata': ..., 'table_keys': ..., 'table_ref': ... }
+        self._store: Dict[str, Dict[Any, dict]] = {}
         self._lock = Lock()
 
     def _serialize_keys(self, table_keys: Optional[dict]) -> str:
@@ -27,6 +47,27 @@ class InMemoryTableBackend:
             return "default"
         return json.dumps(table_keys, sort_keys=True, separators=(",", ":"))
 
+    def _lookup_key(self, table_keys: Optional[dict]):
+        """Hashable bucket key for `table_keys`, without serializing them.
+
+        Plain str/int/bool/None values give a sorted (key, type, value) tuple;
+        two such dicts get the same tuple exactly when their JSON prefixes are
+        equal. Anything else (floats, nested values, non-str keys) falls back to
+        the JSON prefix itself, so grouping is the same as before.
+        """
+        if table_keys is None:
+            return "default"
+        if not isinstance(table_keys, dict):
+            return self._serialize_keys(table_keys)
+        items = []
+        for k, v in table_keys.items():
+            t = type(v)
+            if type(k) is not str or t not in _PLAIN_TYPES:
+                return self._serialize_keys(table_keys)
+            items.append((k, t.__name__, v))
+        items.sort()
+        return tuple(items)
+
     def write_table(self,
                     dataname: str,
                     table_ref_or_keys,
@@ -50,17 +91,25 @@ class InMemoryTableBackend:
         # storage for generality but do not special-case any particular key.
         if isinstance(table_ref_or_keys, dict):
             full_ref = dict(table_ref_or_keys)  # preserve everything
-            table_keys = dict(full_ref) if full_ref else None
+            # the keys are only read from here on, so they share the stored copy
+            table_keys = full_ref or None
         else:
             full_ref = None
             table_keys = table_ref_or_keys
 
-        prefix = self._serialize_keys(table_keys)
+        key = self._lookup_key(table_keys)
 
         with self._lock:
             db = self._store.setdefault(dataname, {})
-            bucket = db.setdefault(prefix, [])
-            bucket.append({
+            bucket = db.get(key)
+            if bucket is None:
+                # serialize/parse the keys once per bucket; get_tables reuses both
+                prefix = key if isinstance(key, str) else self._serialize_keys(
+                    table_keys)
+                stored_keys = None if prefix == 'default' else json.loads(prefix)
+                bucket = db[key] = {'prefix': prefix, 'keys': stored_keys,
+                                    'records': []}
+            bucket['records'].append({
                 'data': table,
                 'metadata': metadata,
                 'table_keys': table_keys,
@@ -70,42 +119,59 @@ class InMemoryTableBackend:
         # return metadata as a convenience (pipeline expects this behavior)
         return metadata
 
-    def _match_value(self, value, selector) -> bool:
+    def _make_matcher(self, selector) -> Callable[[Any], bool]:
+        """Return a predicate for one selector value.
+
+        The selector kind is resolved once here, so get_tables does not
+        dispatch on it again for every stored prefix.
+        """
         # exact match
         if selector is None:
-            return True
+            return lambda value: True
         # callable predicate
         if callable(selector):
-            try:
-                return bool(selector(value))
-            except Exception:
-                return False
+            def match_callable(value):
+                try:
+                    return bool(selector(value))
+                except Exception:
+                    return False
+            return match_callable
         # list/tuple: membership
         if isinstance(selector, (list, tuple)):
             # If both stored value and selector are sequences, treat as
             # sequence equality (useful for path-like lists). Otherwise
             # treat selector as a membership list.
-            if isinstance(value, (list, tuple)):
-                return list(value) == list(selector)
-            return value in selector
+            as_list = list(selector)
+
+            def match_sequence(value):
+                if isinstance(value, (list, tuple)):
+                    return list(value) == as_list
+                return value in selector
+            return match_sequence
         # string semantics: regex, substring, glob, or exact
         if isinstance(selector, str):
             if selector.startswith('re:'):
-                pattern = selector[3:]
                 try:
-                    return re.search(pattern, str(value)) is not None
+                    search = _compile_re(selector[3:]).search
                 except re.error:
-                    return False
+                    return lambda value: False
+                return lambda value: search(str(value)) is not None
             if selector.startswith('in:'):
-                return selector[3:] in str(value)
+                sub = selector[3:]
+                return lambda value: sub in str(value)
             # glob-like
             if any(ch in selector for ch in ['*', '?', '[']):
-                return fnmatch.fnmatch(str(value), selector)
+                match = _compile_glob(selector).match
+                normcase = os.path.normcase
+                return lambda value: match(normcase(str(value))) is not None
             # fallback exact string match
-            return str(value) == selector
+            return lambda value: str(value) == selector
 
         # fallback: equality
-        return value == selector
+        return lambda value: value == selector
+
+    def _match_value(self, value, selector) -> bool:
+        return self._make_matcher(selector)(value)
 
     def get_tables(self,
                    dataname: str,
@@ -124,40 +190,33 @@ class InMemoryTableBackend:
         # keys to match against. No key (including '__path__') is treated
         # specially by this backend; callers are free to include any keys
         # they wish in the selector.
+        # The selector is only read (into matchers below), so it is not copied.
         if isinstance(table_ref_or_keys, dict):
-            req_keys = dict(table_ref_or_keys) if table_ref_or_keys else None
-            req_full_ref = dict(table_ref_or_keys)
+            req_keys = table_ref_or_keys or None
         else:
             req_keys = table_ref_or_keys
-            req_full_ref = None
+
+        # one predicate per selector key, reused for every bucket
+        matchers = None
+        if req_keys is not None:
+            matchers = [(k, self._make_matcher(sel))
+                        for k, sel in req_keys.items()]
 
         out_data = {}
         out_meta = {}
 
         db = self._store.get(dataname, {})
-        # iterate prefixes
-        for prefix, records in db.items():
-            # reconstruct stored table_keys by parsing prefix (if not 'default')
-            try:
-                stored_keys = None if prefix == 'default' else json.loads(
-                    prefix)
-            except Exception:
-                stored_keys = None
+        # iterate buckets (one per distinct table_keys)
+        for bucket in db.values():
+            prefix = bucket['prefix']
+            stored_keys = bucket['keys']
+            records = bucket['records']
 
             # selection: if req_keys provided, every key in req_keys must match stored
-            if req_keys is not None:
-                match_all = True
-                for k, sel in req_keys.items():
-                    stored_val = None
-                    if stored_keys and k in stored_keys:
-                        stored_val = stored_keys[k]
-                    else:
-                        match_all = False
-                        break
-                    if not self._match_value(stored_val, sel):
-                        match_all = False
-                        break
-                if not match_all:
+            if matchers is not None:
+                if not stored_keys or any(k not in stored_keys
+                                          or not m(stored_keys[k])
+                                          for k, m in matchers):
                     continue
 
             # prefix matches; flatten each record
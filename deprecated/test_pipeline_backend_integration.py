@@ -58,3 +58,12 @@ def test_pipeline_forwards_path_columns_to_backend():
             found = True
             break
     assert found, f"expected path '{path_value}' in returned metadata values"
+
+
+def test_in_memory_backend_accepts_non_dict_keys():
+    from deprecated.table_backend import InMemoryTableBackend
+    b = InMemoryTableBackend()
+    b.write_table("d", "plainkey", [1, 2])
+    b.write_table("d", "plainkey", [3])
+    data, _ = b.get_tables("d", None)
+    assert data == {'"plainkey"_data_0': [1, 2], '"plainkey"_data_1': [3]}
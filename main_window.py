@@ -465,12 +465,11 @@ class BatchProcessorGUI(QWidget):
             # 保存（使用 core 的 save 函数）
             save_config(new_config, self.config_path)
 
-            # 更新内存
-            self.config = new_config
+            # 更新内存：按运行时的 load_config（YAML 1.1 SafeLoader）重新读取，
+            # 与 CLI 对同一文本的解析一致（如 yes/on 为布尔值、017 为八进制）
+            self.config = load_config(self.config_path)
 
             self._log(f"✅ 配置已保存: {self.config_path}")
-            # 可选：重新加载以刷新 UI（如果 save_config 没有副作用）
-            # self._load_config()  # 如果你需要刷新显示
 
         except Exception as e:
             self._log(f"❌ 保存失败: {e}")
@@ -515,9 +514,11 @@ class BatchProcessorGUI(QWidget):
 
             # 设置进度回调
             def progress_callback(current, total, status="处理中"):
-                self.progress_bar.setMaximum(total)
+                # total 为 None 时显示为不确定进度
+                self.progress_bar.setMaximum(total or 0)
                 self.progress_bar.setValue(current)
-                self.progress_bar.setFormat(f"{status} [{current}/{total}]")
+                self.progress_bar.setFormat(
+                    f"{status} [{current}/{'?' if total is None else total}]")
 
             processor.set_progress_callback(progress_callback)
 
@@ -574,9 +575,11 @@ class BatchProcessorGUI(QWidget):
 
         # 设置进度回调
         def progress_callback(current, total, status="处理中"):
-            self.progress_bar.setMaximum(total)
+            # total 为 None 时显示为不确定进度
+            self.progress_bar.setMaximum(total or 0)
             self.progress_bar.setValue(current)
-            self.progress_bar.setFormat(f"{status} [{current}/{total}]")
+            self.progress_bar.setFormat(
+                f"{status} [{current}/{'?' if total is None else total}]")
 
         # 创建 worker 和线程
         self.worker = BatchWorker(self.processor, self.root_path, self.context)
@@ -608,6 +611,7 @@ class BatchProcessorGUI(QWidget):
         """用户点击取消"""
         if hasattr(self, 'thread') and self.thread.isRunning():
             self.thread.requestInterruption()  # 请求中断
+            self.processor.cancel()  # 引擎立即可见，无需等待下一次轮询
             self._log("🛑 正在请求取消批处理，请稍候...")
             self.btn_cancel.setEnabled(False)  # 防止重复点击
 
@@ -786,7 +790,7 @@ class BatchProcessorGUI(QWidget):
             return
         context = self.context
         colnames = context.meta_colnames
-        metadata = context.metadata
+        metadata = context.metadata_view()
 
         ##显示
         dialog = QDialog(self)
@@ -13,6 +13,9 @@ from decorators.processor import processor
 
 SCRIPT_DIR = Path(__file__).parent.resolve()  ##此脚本的路径
 
+# 字典文件每行 "键, 值" 或 "键 值" 的分隔符，模块加载时编译一次
+_DICT_SEPARATOR = re.compile(r'\s*,\s*|\s+')
+
 
 @processor(name="backup_file",
            priority=60,
@@ -223,7 +226,6 @@ def set_path_name_dict(path: Path, context: ProcessingContext, **kwargs):
 
     ##文件存在，则读取
     if dict_file.is_file() and not all_dict:  ## all_dict为空字典时
-        separator_pattern = r'\s*,\s*|\s+'
         config = {}
         with open(dict_file, 'r', encoding='utf-8') as f:
             for line_num, line in enumerate(f, 1):
@@ -234,7 +236,7 @@ def set_path_name_dict(path: Path, context: ProcessingContext, **kwargs):
                     continue
 
                 # 使用正则分割，最多分割成两部分（防止值中包含分隔符）
-                parts = re.split(separator_pattern, line, maxsplit=1)
+                parts = _DICT_SEPARATOR.split(line, maxsplit=1)
 
                 if len(parts) < 2:
                     print(f"⚠️  第 {line_num} 行格式错误（缺少值）: {line}")
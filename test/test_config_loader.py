@@ -0,0 +1,56 @@
+import os
+
+from config.loader import load_config
+
+
+def test_load_config_caches_until_file_changes(tmp_path):
+    load_config.cache_clear()
+    cfg_file = tmp_path / "config.yaml"
+    cfg_file.write_text("'*.txt':\n  processors: [backup_file]\n",
+                        encoding="utf-8")
+
+    first = load_config(cfg_file)
+    assert first == {"*.txt": {"processors": ["backup_file"]}}
+
+    # callers get independent copies, mutations must not leak into the cache
+    first["*.txt"]["processors"].append("mutated")
+    second = load_config(cfg_file)
+    assert second["*.txt"]["processors"] == ["backup_file"]
+
+    # rewriting the file (new mtime/size) invalidates the cached entry
+    cfg_file.write_text("'*.log':\n  processors: [analyze_log]\n",
+                        encoding="utf-8")
+    st = cfg_file.stat()
+    os.utime(cfg_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    third = load_config(cfg_file)
+    assert third == {"*.log": {"processors": ["analyze_log"]}}
+
+
+def test_load_config_json(tmp_path):
+    load_config.cache_clear()
+    cfg_file = tmp_path / "config.json"
+    cfg_file.write_text('{"pre_process": "setup_env"}', encoding="utf-8")
+    assert load_config(cfg_file) == {"pre_process": "setup_env"}
+
+
+def test_to_plain_dict_converts_round_trip_data():
+    from config.loader import _yaml_load, to_plain_dict
+
+    data = _yaml_load("a:\n  b: [1, {c: 2}]\n")
+    plain = to_plain_dict(data)
+    assert plain == {"a": {"b": [1, {"c": 2}]}}
+    assert type(plain) is dict
+    assert type(plain["a"]["b"]) is list
+    assert type(plain["a"]["b"][1]) is dict
+
+
+
+def test_saved_editor_text_reloads_with_yaml_1_1_rules(tmp_path):
+    # the GUI saves ruamel round-trip data, then reloads the file with load_config
+    from config.loader import _yaml_load, save_config
+
+    load_config.cache_clear()
+    cfg_file = tmp_path / "config.yaml"
+    save_config(_yaml_load("# note\na: yes\nb: on\nd: 017\n"), cfg_file)
+    assert "# note" in cfg_file.read_text(encoding="utf-8")
+    assert load_config(cfg_file) == {"a": True, "b": True, "d": 15}
@@ -0,0 +1,112 @@
+import pytest
+
+pytest.importorskip("docx")
+
+from decorators.processor import ProcessingContext
+from utils.adapters.docx_helpers import (
+    get_cached_doc,
+    checkpoint_doc,
+    flush_cached_docs,
+)
+
+
+def test_cached_doc_is_reused_and_saved_on_flush(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    ctx = ProcessingContext()
+    doc, p = get_cached_doc(ctx, "out.docx")
+    doc.add_paragraph("one")
+    assert checkpoint_doc(ctx, p) is False
+    # relative and absolute spellings share one live Document
+    same, _ = get_cached_doc(ctx, tmp_path / "out.docx")
+    assert same is doc
+    assert not (tmp_path / "out.docx").exists()
+
+    assert flush_cached_docs(ctx) == [(tmp_path / "out.docx").resolve()]
+    assert flush_cached_docs(ctx) == []
+
+    from docx import Document
+    assert [x.text for x in Document(tmp_path / "out.docx").paragraphs] == ["one"]
+
+
+def test_checkpoint_saves_every_n_modifications(tmp_path):
+    ctx = ProcessingContext()
+    target = tmp_path / "out.docx"
+    doc, _ = get_cached_doc(ctx, target)
+    assert [checkpoint_doc(ctx, target, every=2) for _ in range(3)] == [False, True, False]
+    assert target.exists()
+
+
+def test_rendered_png_is_inserted_from_memory(tmp_path):
+    pytest.importorskip("matplotlib")
+    import io
+    from docx import Document
+    from utils.adapters.docx_helpers import docx_insert_picture
+    from utils.adapters.plot_helpers import render_series_png
+
+    png = render_series_png([([1, 3, 2], {"label": "a"})], title="t")
+    assert png.startswith(b"\x89PNG")
+    assert list(tmp_path.iterdir()) == []
+
+    doc = Document()
+    docx_insert_picture(doc, io.BytesIO(png), width_inches=2.0, caption="c")
+    assert len(doc.inline_shapes) == 1
+
+    out = tmp_path / "p.png"
+    assert render_series_png([([1, 2], {})], str(out)) == out.read_bytes()
+
+
+def test_checkpoint_zero_defers_to_flush(tmp_path):
+    ctx = ProcessingContext()
+    target = tmp_path / "out.docx"
+    get_cached_doc(ctx, target)
+    assert not any(checkpoint_doc(ctx, target, every=0) for _ in range(5))
+    assert not target.exists()
+    assert flush_cached_docs(ctx) == [target.resolve()]
+
+
+def test_insert_table_fills_cells_from_one_xml_fragment():
+    from docx import Document
+    from utils.adapters.docx_helpers import docx_insert_table, docx_merge_cells
+
+    doc = Document()
+    table = docx_insert_table(doc, [["1", 2.5, "<&>"], ["a\tb\nc"]], header=["x", "", "z"])
+    assert [[c.text for c in r.cells] for r in table.rows] == [
+        ["x", "", "z"], ["1", "2.5", "<&>"], ["a\tb\nc", "", ""]]
+    docx_merge_cells(table, [[(0, 0), (0, 1)]])
+    assert table.cell(0, 0)._tc is table.cell(0, 1)._tc
+
+
+def test_add_paragraphs_matches_python_docx_xml():
+    from docx import Document
+    from lxml import etree
+    from utils.adapters.docx_helpers import docx_add_paragraphs
+
+    expected, doc = Document(), Document()
+    expected.add_heading("a\tb <&>", level=3)
+    expected.add_paragraph("label").style = "Normal"
+    expected.add_paragraph()
+    paragraphs = docx_add_paragraphs(doc, [("a\tb <&>", "Heading 3"), ("label", "Normal"), ("", None)])
+    assert [p.text for p in paragraphs] == ["a\tb <&>", "label", ""]
+    # still in front of the section properties, as python-docx inserts them
+    assert etree.tostring(doc.element.body) == etree.tostring(expected.element.body)
+
+
+def test_cached_doc_is_written_when_the_run_ends(tmp_path):
+    from docx import Document
+    from core.engine import BatchProcessor
+
+    root = tmp_path / "root"
+    root.mkdir()
+    (root / "f.txt").write_text("x", encoding="utf-8")
+    target = tmp_path / "out.docx"
+
+    def write(path, context, **kwargs):
+        doc, _ = get_cached_doc(context, target)
+        doc.add_paragraph(path.name)
+        checkpoint_doc(context, target, every=0)
+
+    # no post_process configured: the engine flushes the document itself
+    bp = BatchProcessor({"*.txt": {"processors": ["write"]}})
+    bp.set_processors(main={"write": write})
+    bp.run(root, ProcessingContext())
+    assert [p.text for p in Document(target).paragraphs] == ["f.txt"]
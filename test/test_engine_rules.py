@@ -0,0 +1,312 @@
+from decorators.processor import ProcessingContext
+from core.engine import BatchProcessor
+
+
+def _make_tree(root):
+    (root / "a").mkdir()
+    (root / "a" / "b").mkdir()
+    (root / "a" / "x.txt").write_text("x", encoding="utf-8")
+    (root / "a" / "b" / "y.txt").write_text("y", encoding="utf-8")
+    (root / "a" / "b" / "z.log").write_text("z", encoding="utf-8")
+    (root / "top.txt").write_text("t", encoding="utf-8")
+
+
+def _recording_processors(calls):
+
+    def make(name):
+
+        def _proc(path, context, **kwargs):
+            rel = path.relative_to(context.root_path).as_posix()
+            calls.append((name, rel, kwargs.get("tag")))
+
+        return _proc
+
+    return {n: make(n) for n in ("on_root", "on_dir", "on_txt", "on_exit")}
+
+
+def test_rule_matching_and_order(tmp_path):
+    root = tmp_path / "root"
+    root.mkdir()
+    _make_tree(root)
+    calls = []
+    config = {
+        ".": {
+            "processors": ["on_root"]
+        },
+        "**/": {
+            "post_processors": ["on_exit"]
+        },
+        "a/b/": {
+            "pre_processors": ["on_dir"]
+        },
+        "**/*.txt": {
+            "processors": ["on_txt"],
+            "config": {
+                "tag": "low"
+            },
+            "priority": 1
+        },
+        "a/*.txt": {
+            "processors": ["on_txt"],
+            "config": {
+                "tag": "high"
+            },
+            "priority": 5
+        },
+    }
+    bp = BatchProcessor(config)
+    bp.set_processors(main=_recording_processors(calls))
+    bp.set_status_log(tmp_path / "status.log")
+    bp.run(root, ProcessingContext())
+
+    assert calls == [
+        ("on_root", ".", None),
+        ("on_dir", "a/b", None),
+        ("on_txt", "a/b/y.txt", "low"),
+        ("on_exit", "a/b", None),
+        ("on_txt", "a/x.txt", "high"),
+        ("on_txt", "a/x.txt", "low"),
+        ("on_exit", "a", None),
+        ("on_txt", "top.txt", "low"),
+    ]
+    # the run's status log handle is flushed and closed on return
+    lines = (tmp_path / "status.log").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == len(calls)
+    assert lines[-1].split(" | ")[1] == f"{len(calls)}/{len(calls)}"
+    assert bp._status_fh is None
+
+
+def test_simulate_sequence_counts_steps(tmp_path):
+    _make_tree(tmp_path)
+    config = {
+        "**/*.txt": {
+            "processors": ["on_txt"]
+        },
+        "**/": {
+            "post_processors": ["on_exit"]
+        },
+    }
+    bp = BatchProcessor(config)
+    plan = bp.simulate(tmp_path, sequence=True)
+    phases = [(s["phase"], s["path"]) for s in plan["steps"]]
+    assert phases == [
+        ("inline", "a/b/y.txt"),
+        ("post", "a/b"),
+        ("inline", "a/x.txt"),
+        ("post", "a"),
+        ("inline", "top.txt"),
+    ]
+    assert plan["total_steps"] == 5
+
+
+def test_item_metadata_records_status(tmp_path):
+    root = tmp_path / "root"
+    root.mkdir()
+    _make_tree(root)
+
+    def boom(path, context, **kwargs):
+        raise RuntimeError("bad file")
+
+    config = {"a/*.txt": {"processors": ["boom", "missing"]}}
+    bp = BatchProcessor(config)
+    bp.set_processors(main={"boom": boom})
+    bp.set_status_log(tmp_path / "status.log")
+    ctx = bp.run(root, ProcessingContext())
+
+    meta = ctx.get_metadata(["a/", "x.txt"])
+    assert meta.processors == ["boom", "missing"]
+    assert meta.statuses == ["failed", "failed"]
+    assert meta.errors == ["boom: bad file"]
+    assert meta.warnings == ["missing: 未注册处理器"]
+    assert ctx.get_metadata_flat(("a/", "x.txt")) is meta
+    # the nested view is only built on demand; plain metadata stays separate
+    ctx.update_metadata(note="kept")
+    view = ctx.metadata_view()
+    assert view["a/"]["x.txt"][0] == ["boom", "missing"]
+    assert view["note"] == "kept"
+
+
+def test_cancel_stops_remaining_steps(tmp_path):
+    root = tmp_path / "root"
+    root.mkdir()
+    _make_tree(root)
+    seen = []
+    bp = BatchProcessor({"**/*.txt": {"processors": ["stop"]}})
+
+    def stop(path, context, **kwargs):
+        seen.append(path.name)
+        bp.cancel()
+
+    bp.set_processors(main={"stop": stop})
+    bp.set_status_log(tmp_path / "status.log")
+    bp.run(root, ProcessingContext())
+    assert seen == ["y.txt"]
+
+
+def test_parallel_safe_files_run_in_pool(tmp_path):
+    import threading
+
+    root = tmp_path / "root"
+    root.mkdir()
+    _make_tree(root)
+    calls = []
+    threads = set()
+
+    def on_file(path, context, **kwargs):
+        threads.add(threading.get_ident())
+        calls.append(("on_file", path.name))
+
+    def on_exit(path, context, **kwargs):
+        calls.append(("on_exit", path.name))
+
+    config = {
+        "parallel_workers": 4,
+        "**/*.txt": {
+            "processors": ["on_file"],
+            "parallel_safe": True
+        },
+        "a/": {
+            "post_processors": ["on_exit"]
+        },
+    }
+    bp = BatchProcessor(config)
+    bp.set_processors(main={"on_file": on_file, "on_exit": on_exit})
+    bp.set_status_log(tmp_path / "status.log")
+    bp.run(root, ProcessingContext())
+
+    assert sorted(calls) == sorted([("on_file", "x.txt"), ("on_file", "y.txt"),
+                                    ("on_file", "top.txt"),
+                                    ("on_exit", "a")])
+    # files under a/ finish before a's post-visit
+    assert calls.index(("on_exit", "a")) > max(
+        calls.index(("on_file", "x.txt")), calls.index(("on_file", "y.txt")))
+    assert threading.get_ident() not in threads
+    lines = (tmp_path / "status.log").read_text(encoding="utf-8").splitlines()
+    assert sorted(int(l.split(" | ")[1].split("/")[0]) for l in lines) == [1, 2, 3, 4]
+    assert bp._pool is None
+
+
+def test_status_log_is_opt_in(tmp_path, monkeypatch):
+    root = tmp_path / "root"
+    root.mkdir()
+    _make_tree(root)
+    monkeypatch.chdir(tmp_path)
+    calls = []
+    config = {"**/*.txt": {"processors": ["on_txt"]}}
+    bp = BatchProcessor(config)
+    bp.set_processors(main=_recording_processors(calls))
+    bp.run(root, ProcessingContext())
+    assert len(calls) == 3
+    assert not (tmp_path / "debug_logs").exists()
+
+    bp.set_config(dict(config, status_log_enabled=True))
+    bp.run(root, ProcessingContext())
+    log = tmp_path / "debug_logs" / "status.log"
+    assert len(log.read_text(encoding="utf-8").splitlines()) == 3
+
+
+def test_tracebacks_only_in_debug_mode(tmp_path, capsys):
+    (tmp_path / "f.txt").write_text("x", encoding="utf-8")
+
+    def boom(path, context, **kwargs):
+        raise RuntimeError("bad")
+
+    config = {"*.txt": {"processors": ["boom"]}}
+    bp = BatchProcessor(config)
+    bp.set_processors(main={"boom": boom})
+    bp.run(tmp_path, ProcessingContext())
+    out, err = capsys.readouterr()
+    # each failure is reported once, on the status stream
+    assert out.count("处理失败") == 1
+    assert "RuntimeError" not in out and "Traceback" not in out
+    assert err == ""
+
+    bp.set_config(dict(config, debug_tracebacks=True))
+    bp.run(tmp_path, ProcessingContext())
+    out, err = capsys.readouterr()
+    assert out.count("处理失败") == 1
+    assert "Traceback" in out and "RuntimeError: bad" in out
+    assert err == ""
+
+
+def test_status_lines_stay_in_order_with_processor_output(tmp_path, capsys):
+    (tmp_path / "f.txt").write_text("x", encoding="utf-8")
+
+    def shout(path, context, **kwargs):
+        print("processor output")
+
+    bp = BatchProcessor({"*.txt": {"processors": ["shout"]}})
+    bp.set_processors(main={"shout": shout})
+    bp.run(tmp_path, ProcessingContext())
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].startswith("🔍 开始处理")
+    assert lines.index("processor output") == len(lines) - 1
+
+
+def test_step_status_not_built_when_status_logger_is_quiet(tmp_path, capsys):
+    import logging
+    from core.engine import status_logger
+    (tmp_path / "f.txt").write_text("x", encoding="utf-8")
+
+    bp = BatchProcessor({"*.txt": {"processors": ["noop"]}})
+    bp.set_processors(main={"noop": lambda path, context, **kw: None})
+    status_logger.setLevel(logging.WARNING)
+    try:
+        bp.run(tmp_path, ProcessingContext())
+    finally:
+        status_logger.setLevel(logging.INFO)
+    assert capsys.readouterr().out == ""
+    assert bp.get_current_status() is None
+
+
+def test_qt_interruption_is_checked_before_post_steps(tmp_path):
+    root = tmp_path / "root"
+    root.mkdir()
+    _make_tree(root)
+    calls = []
+    interrupted = []
+
+    class _Thread:
+
+        def isInterruptionRequested(self):
+            return bool(interrupted)
+
+    class _Worker:
+
+        def thread(self):
+            return _Thread()
+
+    def on_file(path, context, **kwargs):
+        calls.append(path.name)
+        interrupted.append(True)
+
+    bp = BatchProcessor({
+        "**/*.txt": {"processors": ["on_file"]},
+        "a/": {"post_processors": ["on_exit"]},
+        "post_process": "finish",
+    })
+    bp.set_processors(main={"on_file": on_file,
+                            "on_exit": lambda p, c, **kw: calls.append("on_exit")},
+                      post={"finish": lambda c, **kw: calls.append("finish")})
+    bp.set_worker(_Worker())
+    bp.run(root, ProcessingContext())
+    assert calls and "on_exit" not in calls and "finish" not in calls
+
+
+def test_run_end_hooks_run_once_even_when_cancelled(tmp_path):
+    root = tmp_path / "root"
+    root.mkdir()
+    _make_tree(root)
+    calls = []
+    bp = BatchProcessor({"**/*.txt": {"processors": ["stop"]}})
+
+    def stop(path, context, **kwargs):
+        # the same key registers once; hooks run in reverse order
+        context.on_run_end("a", lambda c: calls.append(("a", c)))
+        context.on_run_end("b", lambda c: calls.append(("b", c)))
+        bp.cancel()
+
+    bp.set_processors(main={"stop": stop})
+    ctx = bp.run(root, ProcessingContext())
+    assert calls == [("b", ctx), ("a", ctx)]
+    assert ctx.pop_run_end_hooks() == []
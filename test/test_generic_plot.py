@@ -73,3 +73,77 @@ def test_generic_plot():
     }
 
     generic_plot(extract_f, plot_spec, plot_style)
+
+
+def test_minmax_downsample_keeps_extremes():
+    import numpy as np
+    from utils.adapters.plot_helpers import minmax_downsample
+
+    short = [3.0, 1.0, 2.0]
+    x, y = minmax_downsample(short, 10)
+    assert x.tolist() == [0, 1, 2] and y.tolist() == short
+
+    values = np.sin(np.linspace(0, 20, 100_000))
+    values[54_321] = 5.0
+    x, y = minmax_downsample(values, 1000)
+    assert len(x) <= 1000
+    assert np.all(np.diff(x) > 0)
+    assert y.max() == 5.0 and y.min() == values.min()
+
+
+def test_minmax_downsample_skips_all_nan_bins():
+    import numpy as np
+    from utils.adapters.plot_helpers import minmax_downsample
+
+    values = np.sin(np.linspace(0, 20, 10_000))
+    values[:200] = np.nan
+    values[5_000] = np.nan
+    x, y = minmax_downsample(values, 100)
+    assert not np.isnan(y).any()
+    assert x[0] >= 200 and np.all(np.diff(x) > 0)
+    assert y.max() == np.nanmax(values) and y.min() == np.nanmin(values)
+
+    x, y = minmax_downsample(np.full(1_000, np.nan), 100)
+    assert x.size == 0 and y.size == 0
+
+
+def test_render_series_png_is_thread_safe():
+    from concurrent.futures import ThreadPoolExecutor
+    from utils.adapters.plot_helpers import render_series_png
+
+    jobs = [([([i, i + 1, i * 2, 1], {"label": f"s{i}"})], None, f"t{i}") for i in range(8)]
+    expected = [render_series_png(*job) for job in jobs]
+    with ThreadPoolExecutor(4) as pool:
+        assert list(pool.map(lambda job: render_series_png(*job), jobs)) == expected
+
+
+def test_render_series_png_reused_lines_match_fresh_chart():
+    from utils.adapters import plot_helpers
+    from utils.adapters.plot_helpers import render_series_png
+
+    styles = [{"marker": "o", "label": "a"}, {"marker": "s", "label": "b"}]
+    first = [([1, 5, 2, 8], styles[0]), ([3, 3, 4], styles[1])]
+    second = [(list(range(30)), styles[0]), ([-2.5, 7, 0], styles[1])]
+
+    def after_first(reuse_lines):
+        plot_helpers._FIG_CACHE.clear()
+        render_series_png(first, None, "first", max_points=10)
+        if not reuse_lines:
+            plot_helpers._FIG_CACHE[((6, 4), 100)][2] = None  # force ax.cla()
+        return render_series_png(second, None, "second", max_points=10)
+
+    assert after_first(reuse_lines=True) == after_first(reuse_lines=False)
+
+
+def test_reused_axes_shares_the_render_series_cache():
+    from utils.adapters import plot_helpers
+    from utils.adapters.plot_helpers import render_series_png, reused_axes
+
+    series = [([1, 5, 2, 8], {"marker": "o", "label": "a"})]
+    plot_helpers._FIG_CACHE.clear()
+    fresh = render_series_png(series, None, "t")
+    with reused_axes((6, 4), 100) as (fig, ax):
+        ax.bar([0, 1], [3, 4])
+    assert fig is plot_helpers._FIG_CACHE[((6, 4), 100)][0]
+    # a chart drawn through reused_axes must not leak into the next render
+    assert render_series_png(series, None, "t") == fresh
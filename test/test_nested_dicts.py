@@ -0,0 +1,24 @@
+import pytest
+
+from utils.nested_dicts import (get_dict_data, set_dict_data,
+                                setdefault_dict_data)
+
+
+def test_nested_set_get_setdefault():
+    d = {}
+    set_dict_data(d, ["a", "b", "c"], 1)
+    assert d == {"a": {"b": {"c": 1}}}
+    assert get_dict_data(d, ["a", "b", "c"]) == 1
+    assert get_dict_data(d, ["a", "missing"], "dflt") == "dflt"
+    # walking through a non-dict value falls back to the default
+    assert get_dict_data(d, ["a", "b", "c", "d"], "dflt") == "dflt"
+    # a stored None is returned as-is, not replaced by the default
+    set_dict_data(d, ["n"], None)
+    assert get_dict_data(d, ["n"], "dflt") is None
+
+    with pytest.raises(TypeError):
+        set_dict_data(d, ["a", "b", "c", "d"], 2)
+
+    lst = setdefault_dict_data(d, ["x", "y"], [])
+    lst.append(1)
+    assert setdefault_dict_data(d, ["x", "y"], []) == [1]
@@ -0,0 +1,76 @@
+import os
+
+from decorators.processor import ItemMeta, ProcessingContext, RESULT_COLUMNS
+
+
+def test_result_items_are_stored_by_column():
+    ctx = ProcessingContext()
+    ctx.add_result_item("pre", "a.txt", "file", "p1", {"k": 1}, 10)
+    ctx.add_result_item("post", "b", "dir", "p2", {}, None)
+
+    assert ctx.result_columns["processor"] == ["p1", "p2"]
+    assert all(len(ctx.result_columns[c]) == 2 for c in RESULT_COLUMNS)
+    rows = list(ctx.iter_result_items())
+    assert rows[0] == {
+        "phase": "pre", "path": "a.txt", "type": "file",
+        "processor": "p1", "config": {"k": 1}, "result": 10
+    }
+    # results (free-form list) is untouched
+    assert ctx.results == []
+
+    ctx.clear()
+    assert list(ctx.iter_result_items()) == []
+
+
+def test_stat_cache_is_filled_by_the_walk(tmp_path):
+    from core.engine import BatchProcessor
+
+    (tmp_path / "f.txt").write_text("abc", encoding="utf-8")
+    seen = []
+
+    def size(path, context, **kwargs):
+        seen.append(context.stat(path).st_size)
+
+    bp = BatchProcessor({"*.txt": {"processors": ["size"]}})
+    bp.set_processors(main={"size": size})
+    ctx = bp.run(tmp_path, ProcessingContext())
+
+    assert seen == [3]
+    assert isinstance(ctx.stat_cache[str(tmp_path / "f.txt")], os.stat_result)
+
+
+def test_results_index_by_processor_and_subtree():
+    ctx = ProcessingContext()
+    a = {"processor": "scan", "path": os.path.join("root", "a", "x.txt")}
+    b = {"processor": "scan", "path": os.path.join("root", "ab", "y.txt")}
+    c = {"processor": "other", "path": os.path.join("root", "a")}
+    for r in (a, b, c):
+        ctx.add_result(r)
+    ctx.add_result("not a dict")
+
+    assert ctx.results_by_processor("scan") == [a, b]
+    assert ctx.results_under(os.path.join("root", "a")) == [a, c]
+    assert ctx.results_under(os.path.join("root", "a"), "scan") == [a]
+    assert ctx.results_under("root", "scan") == [a, b]
+    assert len(ctx.results) == 4
+
+    ctx.clear()
+    assert ctx.results_under("root") == []
+
+
+def test_item_meta_columns_match_context_colnames():
+    rec = ItemMeta(processors=["p"], statuses=["succeed"])
+    assert ProcessingContext().meta_colnames == list(ItemMeta.COLUMNS.values())
+    assert rec.as_dict()["处理函数"] == ["p"]
+    assert rec.as_dict()["执行情况"] == ["succeed"]
+
+
+def test_results_index_stops_at_root_path(tmp_path):
+    ctx = ProcessingContext()
+    ctx.root_path = tmp_path
+    r = {"processor": "scan", "path": str(tmp_path / "a" / "x.txt")}
+    ctx.add_result(r)
+    assert ctx.results_under(tmp_path) == [r]
+    assert ctx.results_under(tmp_path / "a") == [r]
+    assert ctx.results_under(tmp_path.parent) == []
+    assert len(ctx._results_path_prefix) == 3
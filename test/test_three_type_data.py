@@ -0,0 +1,32 @@
+import numpy as np
+
+from utils.three_type_data import parse_three_type_data, parse_and_plot
+
+
+def test_parse_three_type_data_collects_each_type(tmp_path):
+    f = tmp_path / "d.txt"
+    f.write_bytes(b"TYPE1:1,2,x\r\n  TYPE2:3\rTYPE3:4,5\nother\nTYPE1:6\n")
+    t1, t2, t3 = parse_three_type_data(f)
+    assert t1.tolist() == [1.0, 2.0, 6.0]
+    assert t2.tolist() == [3.0]
+    assert t3.tolist() == [4.0, 5.0]
+
+    empty = tmp_path / "e.txt"
+    empty.write_bytes(b"")
+    assert [a.size for a in parse_three_type_data(empty)] == [0, 0, 0]
+
+
+def test_parse_and_plot_runs_in_a_spawned_worker(tmp_path):
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    f = tmp_path / "d.txt"
+    f.write_text("TYPE1:1,2\nTYPE2:3\n", encoding="utf-8")
+    # importable by module name: no plugin file is executed in the worker
+    with ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn")) as ex:
+        t1, t2, t3, png = ex.submit(parse_and_plot, str(f), None, 1,
+                                    2000).result(timeout=120)
+    assert np.array_equal(t1, [1.0, 2.0]) and t3.size == 0
+    assert png.startswith(b"\x89PNG")
@@ -0,0 +1,50 @@
+import csv
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+from decorators.processor import ProcessingContext
+
+PLUGIN = Path(__file__).resolve().parents[1] / "demos" / "demo3" / "plugins" / "word_plot_pipeline.py"
+
+
+@pytest.fixture(scope="module")
+def plugin():
+    spec = importlib.util.spec_from_file_location("_word_plot_pipeline", PLUGIN)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _csv_reader_values(path):
+    # reference: skip the first record, keep every cell float() accepts
+    vals = []
+    with open(path, "r", encoding="utf-8", errors="ignore", newline="") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for row in reader:
+            for v in row:
+                try:
+                    vals.append(float(v))
+                except ValueError:
+                    pass
+    return vals
+
+
+@pytest.mark.parametrize("text", [
+    "a,b\n1,2,3\n4,5\n",
+    "h\n1,2\n3,4\n",
+    "a,b\n1,2\n3,4,5\n6,7\n",
+    "a,b,c\n1\n2,3\n,4,\n",
+    "a,b\n 1 ,\"2\"\n\nx,1_000\nnan,inf\n",
+    "\n5,6\n7,8\n",
+    "a,b\n",
+])
+def test_read_data_files_keeps_every_csv_value(plugin, tmp_path, text):
+    f = tmp_path / "d.csv"
+    f.write_text(text, encoding="utf-8")
+    ctx = ProcessingContext()
+    plugin.read_data_files(f, ctx)
+    got = list(ctx.get_data(["folder_data", str(f)], []))
+    assert got == pytest.approx(_csv_reader_values(f), nan_ok=True)
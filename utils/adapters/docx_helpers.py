@@ -1,5 +1,8 @@
+import re
+import weakref
 from pathlib import Path
 from typing import Tuple, List, Optional, Sequence
+from xml.sax.saxutils import escape, quoteattr
 
 def get_or_create_doc(doc_path: str) -> Tuple[object, Path]:
     """Return a python-docx Document and its path. Adapter to decouple docx from core utils."""
@@ -11,18 +14,79 @@ def get_or_create_doc(doc_path: str) -> Tuple[object, Path]:
 def save_doc(doc, path: Path) -> None:
     doc.save(str(path))
 
+# Documents kept open for the whole run: context.shared[_DOC_CACHE_KEY] maps the
+# resolved path to [doc, unsaved modification count]
+_DOC_CACHE_KEY = ["docx_helpers", "open_docs"]
+# path as passed by processors -> resolved key, so resolve() runs once per spelling
+_DOC_ALIAS_KEY = ["docx_helpers", "doc_aliases"]
+DOC_CHECKPOINT_EVERY = 50
+
+def _doc_key(context, doc_path) -> str:
+    aliases = context.setdefault_shared(_DOC_ALIAS_KEY, {})
+    raw = str(doc_path)
+    key = aliases.get(raw)
+    if key is None:
+        key = aliases[raw] = str(Path(raw).resolve())
+    return key
+
+def get_cached_doc(context, doc_path) -> Tuple[object, Path]:
+    """Like `get_or_create_doc`, but keeps the Document open in `context.shared`.
+
+    Later calls for the same file return the live object instead of
+    re-parsing it. Pair with `checkpoint_doc` after each modification; the
+    engine calls `flush_cached_docs` when the run ends (registered here via
+    `context.on_run_end`), so no extra config is needed to get the file written.
+    """
+    p = Path(doc_path)
+    docs = context.setdefault_shared(_DOC_CACHE_KEY, {})
+    key = _doc_key(context, doc_path)
+    entry = docs.get(key)
+    if entry is None:
+        doc, p = get_or_create_doc(p)
+        entry = docs[key] = [doc, 0]
+        on_run_end = getattr(context, "on_run_end", None)
+        if on_run_end is not None:
+            on_run_end(flush_cached_docs, flush_cached_docs)
+    return entry[0], p
+
+def checkpoint_doc(context, doc_path, every: int = DOC_CHECKPOINT_EVERY) -> bool:
+    """Count one modification of a cached document; save it every `every` modifications.
+
+    `every <= 0` never saves here; the document is written by `flush_cached_docs`.
+    Returns True when the document was written to disk.
+    """
+    entry = context.get_shared(_DOC_CACHE_KEY, {}).get(_doc_key(context, doc_path))
+    if entry is None:
+        return False
+    entry[1] += 1
+    if every <= 0 or entry[1] < every:
+        return False
+    save_doc(entry[0], Path(doc_path))
+    entry[1] = 0
+    return True
+
+def flush_cached_docs(context) -> List[Path]:
+    """Save every cached document with unsaved modifications; returns the saved paths."""
+    saved = []
+    for key, entry in context.get_shared(_DOC_CACHE_KEY, {}).items():
+        if entry[1]:
+            save_doc(entry[0], Path(key))
+            entry[1] = 0
+            saved.append(Path(key))
+    return saved
+
 def docx_write_text(doc, text: str = "", style: str = "Normal", align: Optional[int] = None) -> None:
     """Write a paragraph to the end of document with optional style and alignment.
 
     align uses python-docx alignment values: 0=LEFT, 1=CENTER, 2=RIGHT, 3=JUSTIFY.
     """
-    from docx.enum.text import WD_ALIGN_PARAGRAPH
     p = doc.add_paragraph(text)
     try:
         p.style = style
     except Exception:
         pass
     if align is not None:
+        from docx.enum.text import WD_ALIGN_PARAGRAPH
         try:
             mapping = {
                 0: WD_ALIGN_PARAGRAPH.LEFT,
@@ -34,39 +98,106 @@ def docx_write_text(doc, text: str = "", style: str = "Normal", align: Optional[
         except Exception:
             pass
 
+_RUN_SPECIAL = re.compile(r"([\t\n\r])")
+
+
+def _run_xml(text: str) -> str:
+    """Run content XML for text, same as python-docx's run.text setter (tab -> w:tab, newline -> w:br)."""
+    parts = []
+    for piece in _RUN_SPECIAL.split(text):
+        if piece == "\t":
+            parts.append("<w:tab/>")
+        elif piece in ("\n", "\r"):
+            parts.append("<w:br/>")
+        elif piece:
+            space = ' xml:space="preserve"' if piece != piece.strip() else ""
+            parts.append(f"<w:t{space}>{escape(piece)}</w:t>")
+    return "".join(parts)
+
+# document part -> {paragraph style name: style id}; python-docx resolves a name by
+# scanning all styles each time (about 1 ms), the ids do not change during a run
+_STYLE_IDS: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+def _paragraph_style_id(doc, style: str) -> Optional[str]:
+    ids = _STYLE_IDS.setdefault(doc.part, {})
+    if style not in ids:
+        from docx.enum.style import WD_STYLE_TYPE
+        ids[style] = doc.part.get_style_id(style, WD_STYLE_TYPE.PARAGRAPH)
+    return ids[style]
+
+def docx_add_paragraphs(doc, items: Sequence[Tuple[str, Optional[str]]]) -> List[object]:
+    """Append several paragraphs at the end of the body in one go; returns their Paragraph objects.
+
+    items: (text, style name or None) pairs, same XML as `doc.add_paragraph(text, style)` per item
+    (add_heading(text, n) is style "Heading n"). python-docx looks up w:sectPr by scanning the body
+    on every add_*, which gets slow on long documents; here the new paragraphs are parsed as one
+    fragment and placed before the trailing w:sectPr once.
+    """
+    from docx.oxml import parse_xml
+    from docx.oxml.ns import nsdecls, qn
+    from docx.text.paragraph import Paragraph
+    xml = []
+    for text, style in items:
+        ppr = ""
+        if style is not None:
+            style_id = _paragraph_style_id(doc, style)
+            # the default style leaves an empty pPr, like Paragraph.style = "Normal"
+            ppr = f"<w:pPr><w:pStyle w:val={quoteattr(style_id)}/></w:pPr>" if style_id else "<w:pPr/>"
+        run = f"<w:r>{_run_xml(text)}</w:r>" if text else ""
+        xml.append(f"<w:p>{ppr}{run}</w:p>")
+    paragraphs = list(parse_xml(f'<w:body {nsdecls("w")}>{"".join(xml)}</w:body>'))
+    body = doc.element.body
+    # w:sectPr is normally the last child; body[-1] is O(1) where len(body) counts all children
+    try:
+        sect_pr = body[-1]
+    except IndexError:
+        sect_pr = None
+    if sect_pr is not None and sect_pr.tag != qn("w:sectPr"):
+        sect_pr = body.find(qn("w:sectPr"))
+    for p in paragraphs:
+        if sect_pr is not None:
+            sect_pr.addprevious(p)
+        else:
+            body.append(p)
+    return [Paragraph(p, doc._body) for p in paragraphs]
+
 def docx_insert_table(doc, data: List[List[str]], header: Optional[List[str]] = None, caption: Optional[str] = None, style: Optional[str] = None):
     """Insert a table filled by data (2D list). Optionally add header row and caption paragraph."""
     rows = len(data) + (1 if header else 0)
     cols = len(header) if header else (len(data[0]) if data else 0)
     if rows == 0 or cols == 0:
         return None
-    table = doc.add_table(rows=rows, cols=cols)
+    from docx.oxml import parse_xml
+    from docx.oxml.ns import nsdecls, qn
+    table = doc.add_table(rows=0, cols=cols)
     if style:
         try:
             table.style = style
         except Exception:
             pass
-    r = 0
-    if header:
-        hdr = table.rows[0].cells
-        for j, h in enumerate(header):
-            hdr[j].text = str(h)
-        r = 1
-    for i, row in enumerate(data):
-        cells = table.rows[r + i].cells
-        for j, val in enumerate(row[:cols]):
-            cells[j].text = str(val)
+    # 所有行拼成一段 XML 一次解析后挂到表格下，不再逐格经 _Cell.text 重建元素树
+    tcs = [f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{g.get(qn("w:w"))}"/></w:tcPr><w:p>'
+           for g in table._tbl.tblGrid.gridCol_lst]
+    body = []
+    for row in ([header] if header else []) + list(data):
+        row = list(row[:cols])
+        body.append("<w:tr>")
+        body.extend(f"{tc}<w:r>{_run_xml(str(val))}</w:r></w:p></w:tc>" for tc, val in zip(tcs, row))
+        body.extend(f"{tc}</w:p></w:tc>" for tc in tcs[len(row):])  # 短行补空单元格
+        body.append("</w:tr>")
+    table._tbl.extend(list(parse_xml(f'<w:tbl {nsdecls("w")}>{"".join(body)}</w:tbl>')))
     if caption:
         doc.add_paragraph(f"Table: {caption}")
     return table
 
-def docx_insert_picture(doc, pic_path: Path, width_inches: Optional[float] = None, caption: Optional[str] = None):
-    """Insert a picture from path with optional width (in inches) and caption."""
+def docx_insert_picture(doc, pic_path, width_inches: Optional[float] = None, caption: Optional[str] = None):
+    """Insert a picture from a path or an open binary stream with optional width (in inches) and caption."""
     from docx.shared import Inches
+    src = pic_path if hasattr(pic_path, "read") else str(pic_path)
     if width_inches is not None:
-        doc.add_picture(str(pic_path), width=Inches(width_inches))
+        doc.add_picture(src, width=Inches(width_inches))
     else:
-        doc.add_picture(str(pic_path))
+        doc.add_picture(src)
     if caption:
         doc.add_paragraph(f"Figure: {caption}")
 
@@ -17,8 +17,14 @@ Storage
     `context.data['plot_extract_meta'][str(target)]` for downstream
     processors to consume.
 """
+import io
+import os
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Callable
+from typing import Any, Dict, List, Optional, Callable, Tuple
+
+import numpy as np
 
 
 def save_plot_png_values(values: List[float], out_path: Path,
@@ -34,8 +40,7 @@ def save_plot_png_values(values: List[float], out_path: Path,
         ax.grid(True)
         ax.set_title(cfg.get("title", "数据曲线"))
         fig.tight_layout()
-        canvas = FigureCanvas(fig)
-        canvas.draw()
+        FigureCanvas(fig)  # savefig renders once through this Agg canvas
         fig.savefig(out_path)
         return out_path
     except Exception:
@@ -69,6 +74,135 @@ def save_plot_png_values(values: List[float], out_path: Path,
         return out_path
 
 
+def minmax_downsample(values, target: int):
+    """Return `(x indices, y)` for plotting at most about `target` points.
+
+    Longer series are cut into ~target/2 equal bins and each bin keeps its
+    minimum and maximum (in original order), so the outline and the extremes
+    of the curve are preserved. Shorter series are returned unchanged.
+    Bins holding only NaN are left out.
+    """
+    v = np.asarray(values, dtype=np.float64)
+    n = len(v)
+    if n <= max(target, 2):
+        return np.arange(n), v
+    size = -(-n // max(1, target // 2))
+    bins = -(-n // size)
+    rows = np.full(bins * size, np.nan)
+    rows[:n] = v
+    rows = rows.reshape(bins, size)
+    keep = ~np.isnan(rows).all(1)  # nanargmin/nanargmax raise on an all-NaN row
+    rows = rows[keep]
+    idx = np.sort(np.stack([np.nanargmin(rows, 1), np.nanargmax(rows, 1)], 1), 1)
+    idx = (idx + np.flatnonzero(keep)[:, None] * size).ravel()
+    idx = idx[np.diff(idx, prepend=-1) != 0]  # min and max are the same point
+    return idx, v[idx]
+
+
+# O_BINARY: without it Windows opens the descriptor in text mode and mangles the PNG
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+
+
+def write_png(path, png: bytes) -> None:
+    """Write encoded PNG bytes to `path` with a raw descriptor (no buffered file object)."""
+    fd = os.open(path, _WRITE_FLAGS, 0o644)
+    try:
+        view = memoryview(png)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+# Figure/Axes reused per (figsize, dpi) within one process (each pool worker keeps its own);
+# the lock serializes callers running on threads of the same process.
+# Entries are [fig, ax, layout of the drawn lines, Line2D list].
+_FIG_CACHE: Dict[tuple, list] = {}
+_FIG_LOCK = threading.Lock()
+
+
+def _fig_entry(figsize, dpi) -> list:
+    """Cache entry for (figsize, dpi), created on first use; the caller holds _FIG_LOCK."""
+    key = (tuple(figsize), dpi)
+    entry = _FIG_CACHE.get(key)
+    if entry is None:
+        fig = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(fig)  # attach the Agg canvas once; savefig reuses it
+        entry = _FIG_CACHE[key] = [fig, fig.add_subplot(111), None, []]
+    return entry
+
+
+@contextmanager
+def reused_axes(figsize, dpi):
+    """Yield `(fig, ax)` from the shared figure cache with the axes cleared.
+
+    Rebuilding a Figure per plot costs far more than `ax.cla()`. The cache
+    lock is held until the block exits, so draw and savefig inside it.
+    """
+    with _FIG_LOCK:
+        entry = _fig_entry(figsize, dpi)
+        entry[1].cla()
+        entry[2:] = [None, []]  # render_series_png must redraw its lines
+        yield entry[0], entry[1]
+
+
+def render_series_png(series: List[Tuple[List[float], Dict[str, Any]]],
+                      out_path: Optional[str] = None,
+                      title: str = "",
+                      figsize: Tuple[float, float] = (6, 4),
+                      dpi: int = 100,
+                      xlabel: Optional[str] = None,
+                      ylabel: Optional[str] = None,
+                      max_points: Optional[int] = None,
+                      compress_level: Optional[int] = None) -> bytes:
+    """Draw `series` (a list of `(values, ax.plot kwargs)`) as one line chart PNG.
+
+    Series longer than `max_points` are min-max downsampled first;
+    `compress_level` (0-9) trades PNG size for encode time.
+    Returns the PNG bytes; they are also written to `out_path` when given.
+    Module-level and argument-only, so it can be submitted to a
+    ProcessPoolExecutor.
+
+    When the line styles and axis labels match the previous chart of the same
+    size, the new data is swapped into the existing lines instead of clearing
+    the axes (ax.cla() is most of the cost of a small chart).
+    """
+    buf = io.BytesIO()
+    points = [minmax_downsample(values, max_points) if max_points
+              else (np.arange(len(values)), values) for values, _ in series]
+    layout = ([dict(kwargs) for _, kwargs in series], xlabel, ylabel)
+    with _FIG_LOCK:
+        cached = _fig_entry(figsize, dpi)
+        fig, ax, drawn_layout, lines = cached
+        if layout == drawn_layout:
+            for line, (x, y) in zip(lines, points):
+                line.set_data(x, y)
+            ax.relim()
+            ax.autoscale_view()
+        else:
+            ax.cla()
+            lines = [ax.plot(x, y, **kwargs)[0]
+                     for (x, y), (_, kwargs) in zip(points, series)]
+            if xlabel:
+                ax.set_xlabel(xlabel)
+            if ylabel:
+                ax.set_ylabel(ylabel)
+            if any(kwargs.get("label") for _, kwargs in series):
+                ax.legend()
+            ax.grid(True, alpha=0.3)
+            cached[2:] = [layout, lines]
+        ax.set_title(title)
+        fig.tight_layout()
+        if compress_level is None:
+            fig.savefig(buf, format="png")
+        else:
+            fig.savefig(buf, format="png", pil_kwargs={"compress_level": compress_level})
+    png = buf.getvalue()
+    if out_path:
+        write_png(out_path, png)
+    return png
+
+
 def prepare_plot_data_adapter(target: Path,
                               *,
                               cache_key: str = None,
@@ -122,6 +256,8 @@ import math
 import colorsys
 import matplotlib.pyplot as plt
 import matplotlib.gridspec as gridspec
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from typing import Callable, Any, Dict, List, Optional, Tuple, Union
 from matplotlib import font_manager
 
@@ -512,13 +648,7 @@ def generic_plot(extract_f: Callable[[Any], List[float]],
     if "save_path" in plot_spec:
         # Save to file when requested (non-blocking)
         try:
-            # draw on Agg canvas if available
-            if 'canvas' in locals() and getattr(locals()['canvas'], 'draw',
-                                                None):
-                try:
-                    locals()['canvas'].draw()
-                except Exception:
-                    pass
+            # savefig renders the figure itself; no separate canvas.draw()
             fig.savefig(plot_spec["save_path"],
                         dpi=default_style.get("dpi", 100),
                         bbox_inches='tight')
@@ -8,7 +8,25 @@ def safe_read_text(path: Path, encoding: str = "utf-8") -> str:
     except Exception:
         return ""
 
+# JSON 优先用 orjson 解析（可选依赖，直接解析 bytes，不先解码成 str）
+try:
+    import orjson
+    _orjson_loads = orjson.loads
+except ImportError:
+    _orjson_loads = None
+
 def safe_read_json(path: Path, encoding: str = "utf-8") -> Any:
+    if _orjson_loads is not None and encoding.lower().replace("-", "").replace("_", "") == "utf8":
+        try:
+            raw = path.read_bytes()
+        except Exception:
+            return None
+        if not raw:
+            return None
+        try:
+            return _orjson_loads(raw)
+        except Exception:
+            pass  # NaN、超出 64 位的整数、非法 UTF-8 等 orjson 不接受的输入交给标准库
     try:
         txt = safe_read_text(path, encoding)
         return json.loads(txt) if txt else None
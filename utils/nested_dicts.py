@@ -14,22 +14,36 @@ from typing import Any, Dict, List
 import json
 
 
+# sentinel for "key absent" so lookups need a single dict.get per level
+_MISSING = object()
+
+
+def _parent_for_set(datadict: Dict[Any, Any], keys: List[Any]) -> Dict:
+    """Walk (creating as needed) to the dict that holds keys[-1]."""
+    shared = datadict
+    _dict = dict
+    _isinstance = isinstance
+    for key in keys[:-1]:
+        node = shared.get(key, _MISSING)
+        if node is _MISSING:
+            node = shared[key] = {}
+        elif not _isinstance(node, _dict):
+            raise TypeError(
+                f"Cannot set nested key '{key}' because it is not a dict")
+        shared = node
+    return shared
+
+
 def set_dict_data(datadict: Dict[Any, Any], keys: Any, value: Any) -> None:
     if not isinstance(keys, list):
         datadict[keys] = value
         return
     if len(keys) == 0:
         raise ValueError("Keys list cannot be empty")
-
-    shared = datadict
-    for key in keys[:-1]:
-        if key not in shared:
-            shared[key] = {}
-        if not isinstance(shared[key], dict):
-            raise TypeError(
-                f"Cannot set nested key '{key}' because it is not a dict")
-        shared = shared[key]
-    shared[keys[-1]] = value
+    if len(keys) == 1:
+        datadict[keys[0]] = value
+        return
+    _parent_for_set(datadict, keys)[keys[-1]] = value
 
 
 def get_dict_data(datadict: Dict[Any, Any],
@@ -41,14 +55,15 @@ def get_dict_data(datadict: Dict[Any, Any],
         return default
 
     shared = datadict
-    try:
-        for key in keys:
-            if not isinstance(shared, dict) or key not in shared:
-                raise KeyError(key)
-            shared = shared[key]
-        return shared
-    except (KeyError, TypeError):
-        return default
+    _dict = dict
+    _isinstance = isinstance
+    for key in keys:
+        if not _isinstance(shared, _dict):
+            return default
+        shared = shared.get(key, _MISSING)
+        if shared is _MISSING:
+            return default
+    return shared
 
 
 def setdefault_dict_data(datadict: Dict, keys: Any, default=None):
@@ -57,16 +72,7 @@ def setdefault_dict_data(datadict: Dict, keys: Any, default=None):
     if len(keys) == 0:
         return default
 
-    shared = datadict
-    for key in keys[:-1]:
-        if key not in shared:
-            shared[key] = {}
-        if not isinstance(shared[key], dict):
-            raise TypeError(
-                f"Cannot set nested key '{key}' because it is not a dict")
-        shared = shared[key]
-
-    return shared.setdefault(keys[-1], default)
+    return _parent_for_set(datadict, keys).setdefault(keys[-1], default)
 
 
 def delete_dict_data(datadict: Dict, keys: Any) -> bool:
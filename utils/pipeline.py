@@ -12,8 +12,9 @@ carries metadata and any sequence-valued per-row columns (backend normalizes
 these into table rows and metadata).
 """
 
+from array import array
 from pathlib import Path
-from typing import Any, List, Dict, Optional, Tuple
+from typing import Any, Iterable, List, Dict, Optional, Tuple
 import fnmatch
 import re
 import json
@@ -77,6 +78,8 @@ def get_bucket(context, key: Any, default: Optional[Any] = None):
 
     Supports two styles:
     - Nested data path (list): get/set in context.data via setdefault.
+      Pass ``array('d')`` as default for purely numeric buckets (see
+      `append_numbers`).
     - Simple string name: creates/returns a dict under shared ['pipeline','buckets', name].
     """
     if isinstance(key, list):
@@ -88,11 +91,17 @@ def get_bucket(context, key: Any, default: Optional[Any] = None):
                               default if isinstance(default, dict) else {})
 
 
-def append_numbers(context, key_parts: List[str], values: List[float]) -> int:
-    """Append numeric values to a list stored at nested key_parts in context.data."""
-    bucket: List[float] = context.setdefault_data(key_parts, [])
+def append_numbers(context, key_parts: List[str], values: Iterable[float]) -> int:
+    """Append numeric values to the bucket stored at nested key_parts in context.data.
+
+    New buckets are ``array('d')`` (8 bytes per value instead of a boxed
+    float per item); existing list buckets are extended as before. Returns
+    the number of values appended.
+    """
+    bucket = context.setdefault_data(key_parts, array('d'))
+    before = len(bucket)
     bucket.extend(values)
-    return len(values)
+    return len(bucket) - before
 
 
 def set_output(context, *args, **kwargs):
@@ -0,0 +1,94 @@
+"""Parsing of the complex demo's three-type data files (TYPE1:/TYPE2:/TYPE3: lines).
+
+Kept out of the plugin so worker processes can import it by module name;
+matplotlib is only imported when a plot is rendered.
+"""
+import mmap
+import os
+import re
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+# A TYPE line: optional leading blanks, the prefix, then the comma-separated numbers.
+# Byte patterns run over the mmap'ed file; a \r left by \r\n endings is
+# whitespace to the float conversion. Lone \r line ends need the slower pattern.
+_TYPE_LINE = re.compile(rb"^[^\S\n]*(TYPE[123]:)(.*)$", re.M)
+_TYPE_LINE_CR = re.compile(rb"(?:^|(?<=\r))[^\S\r\n]*(TYPE[123]:)([^\r\n]*)", re.M)
+_LONE_CR = re.compile(rb"\r(?!\n)")
+
+
+def _to_floats(chunks: List[bytes]) -> np.ndarray:
+    """Convert comma-separated number chunks in one numpy call; invalid tokens are skipped."""
+    if not chunks:
+        return np.empty(0)
+    tokens = b",".join(chunks).decode("utf-8", "ignore").split(",")
+    try:
+        return np.array(tokens, dtype=np.float64)
+    except ValueError:
+        pass
+    values = []
+    for num in tokens:
+        try:
+            values.append(float(num))
+        except ValueError:
+            pass
+    return np.array(values, dtype=np.float64)
+
+
+def parse_three_type_data(
+        file_path: Path) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Parse file with 3 types of data.
+
+    The file is memory-mapped and scanned once by a compiled byte regex; the
+    number part of every TYPE line is collected per type and converted with a
+    single numpy call per type.
+
+    Returns:
+        Tuple of (type1_data, type2_data, type3_data) as float64 arrays
+    """
+    chunks = {b"TYPE1:": [], b"TYPE2:": [], b"TYPE3:": []}
+
+    try:
+        # the pages stay in the OS page cache: no decoded str copy of the
+        # whole file and no per-line objects, only the matched number parts
+        with open(file_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size:  # mmap rejects empty files
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    pattern = _TYPE_LINE_CR if _LONE_CR.search(mm) else _TYPE_LINE
+                    for prefix, nums in pattern.findall(mm):
+                        chunks[prefix].append(nums)
+    except Exception as e:
+        print(f"Error parsing file {file_path}: {e}")
+
+    return (_to_floats(chunks[b"TYPE1:"]), _to_floats(chunks[b"TYPE2:"]),
+            _to_floats(chunks[b"TYPE3:"]))
+
+
+def parse_and_plot(file_path: str, img_path, compress_level: int,
+                   max_points: int):
+    """Parse one file and render its plot (the complex demo's per-file work).
+
+    Module-level and importable by name, so a process pool can run it
+    without loading the plugin. Returns (type1, type2, type3, png); png is
+    None when the file has no data or rendering failed.
+    """
+    from utils.adapters.plot_helpers import render_series_png
+
+    path = Path(file_path)
+    type1, type2, type3 = parse_three_type_data(path)
+    series = [(values, kwargs) for values, kwargs in (
+        (type1, dict(marker='o', label='Type1 主要数据', linewidth=2, markersize=4)),
+        (type2, dict(marker='s', label='Type2 辅助数据1', linewidth=1.5, markersize=4)),
+        (type3, dict(marker='^', label='Type3 辅助数据2', linewidth=1.5, markersize=4)),
+    ) if values.size]
+    png = None
+    if series:
+        try:
+            png = render_series_png(series, img_path, f"数据曲线 - {path.stem}",
+                                    (6, 4), 100, "索引", "数值",
+                                    max_points, compress_level)
+        except Exception:
+            png = None
+    return type1, type2, type3, png
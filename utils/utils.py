@@ -1,25 +1,44 @@
 ##一些工具函数
+import os
+import operator
 from pathlib import Path
+from typing import List, Tuple
 
 
 
 
+# 按 Path 排序（与原先的 sorted(p.iterdir()) 一致；Windows 下不区分大小写）
+_path_key = operator.itemgetter(0)
+
+
 ##文件夹和文件的排序， 严格树状展开排序
-def preorder_tree_paths(root: Path):
+def preorder_tree_entries(root: Path) -> List[Tuple[Path, bool]]:
+    """与 preorder_tree_paths 顺序相同，但返回 (path, is_dir) 元组。
+
+    基于 os.scandir：is_dir/is_file 取自目录项缓存，每个目录只需一次系统调用，
+    调用方无需再对每个条目 stat。
+    """
+    root = Path(root)
     result = []
-    def dfs(p):
-        result.append(p)
-        if p.is_dir():
+
+    def dfs(p: Path, is_dir: bool):
+        result.append((p, is_dir))
+        if is_dir:
             try:
-                items = sorted(p.iterdir())
-                dirs = [x for x in items if x.is_dir()]
-                files = [x for x in items if x.is_file()]
+                with os.scandir(p) as it:
+                    entries = sorted(((Path(e.path), e) for e in it), key=_path_key)
+                dirs = [c for c, e in entries if e.is_dir()]
+                files = [c for c, e in entries if e.is_file()]
                 for d in dirs:
-                    dfs(d)
+                    dfs(d, True)
                 for f in files:
-                    result.append(f)
+                    result.append((f, False))
             except PermissionError:
                 pass
-    dfs(root)
+
+    dfs(root, root.is_dir())
     return result
 
+
+def preorder_tree_paths(root: Path):
+    return [p for p, _ in preorder_tree_entries(root)]
@@ -39,7 +39,8 @@ class BatchWorker(QObject):
             sys.stdout = WriteStream(lambda s: self.log.emit(s))
 
             def progress_callback(current, total, status="处理中"):
-                self.progress.emit(current, total, status)
+                # 信号为 (int, int, str)，未知总数用 0 表示
+                self.progress.emit(current, total or 0, status)
 
         # ✅ 将当前线程传给 processor，用于检查中断
 